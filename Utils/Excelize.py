@@ -1,6 +1,7 @@
 import csv
 import re
-from typing import Any, List
+from collections import namedtuple
+from typing import Any, Dict, Iterator, List, Tuple, Union
 
 import openpyxl
 from openpyxl.styles import Alignment, Font
@@ -240,6 +241,76 @@ class ReadExcel:
             self.Sheet.selected_sheet.column_dimensions.group(column_name, hidden=True)
 
 
+class StreamReadExcel:
+    """
+    只读流式读取excel数据的类，适用于很大的表格
+    以 read_only 模式打开工作簿，按行惰性生成轻量的 namedtuple 记录，不会把整个表格加载到内存中
+    更新数据请使用 bulk_write_excel 一次性写入
+    """
+
+    def __init__(self, file_name: str, sheet_name: str = None):
+        self.file_name = file_name
+        self.wb = openpyxl.load_workbook(self.file_name, read_only=True)
+        self.sheet_name = sheet_name if sheet_name else self.wb.sheetnames[0]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.wb.close()
+
+    @property
+    def sheet_lists(self) -> List[str]:
+        return self.wb.sheetnames
+
+    def iter_records(self, sheet: str = None) -> Iterator[tuple]:
+        """
+        逐行生成用例记录，字段为表头（非法的字段名会被重命名为 _序号），另有 max_column 和 row 两个字段，同 read_data_obj
+        :param sheet: 可选的工作表名
+        :return: namedtuple 记录的迭代器
+        """
+        ws = self.wb[sheet or self.sheet_name]
+        rows = ws.iter_rows(values_only=True)
+        titles = next(rows, None)
+        if titles is None:
+            return
+
+        columns = [index for index, title in enumerate(titles) if title is not None]
+        record_cls = namedtuple('Record', [str(titles[index]) for index in columns] + ['max_column', 'row'],
+                                rename=True)
+        column_num = len(titles)
+
+        for row_num, values in enumerate(rows, 2):
+            values = tuple(values) + (None,) * (column_num - len(values))
+            yield record_cls(*(values[index] for index in columns), column_num, row_num)
+
+
+def bulk_write_excel(file_name: str, cells: Dict[Union[str, Tuple[int, int]], Any], sheet_name: str = None,
+                     output_path: str = None) -> str:
+    """
+    一次性批量写入单元格：只加载和保存工作簿一次
+    :param file_name: excel文件路径
+    :param cells: 单元格数据，键为 "B12" 或 (行, 列)，例如 {'B12': 'pass', (3, 2): 'fail'}
+    :param sheet_name: 工作表名，默认为第一个工作表
+    :param output_path: 输出的excel文件路径，默认覆盖原文件
+    :return: 输出的excel文件路径
+    """
+    wb = openpyxl.load_workbook(file_name)
+    try:
+        ws = wb[sheet_name] if sheet_name else wb[wb.sheetnames[0]]
+        for position, data in cells.items():
+            row, column = get_row_column(position) if isinstance(position, str) else position
+            ws.cell(row, column, data)
+        output_path = output_path or file_name
+        wb.save(output_path)
+    finally:
+        wb.close()
+    return output_path
+
+
 if __name__ == '__main__':
     r = ReadExcel("../SearchWords/SearchWords_v3.xlsx", sheet_name="July")
     r.selected_sheet = "Sheet1"
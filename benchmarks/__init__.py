@@ -0,0 +1,2 @@
+#!/usr/bin/env python
+# _*_ coding:utf-8 _*_
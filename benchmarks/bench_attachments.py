@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+# _*_ coding:utf-8 _*_
+import argparse
+import hashlib
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.generator import gen_workbook, write_xmind, count_testcases, XMIND_8, XMIND_ZEN
+
+"""
+Compare the I/O and the memory of loading image-heavy XMind files
+
+Each way runs in a fresh process, which reports the bytes it read (`rchar` of /proc/self/io, Linux only)
+and its RSS growth (the max RSS after minus before, in KiB) while loading the file:
+
+ xmind.load         the `xmind` package, like the former parser
+ full-file hash     the former cache check hashing the whole archive, then the loader
+ content hash       the cache check hashing only the content members, then the loader
+
+Usage:
+ python -m benchmarks.bench_attachments [--images 20] [--image-size 262144] [--breadth 6] [--depth 2]
+"""
+
+MODES = ('xmind.load', 'full-file hash', 'content hash')
+
+
+def read_bytes():
+    try:
+        with open('/proc/self/io') as f:
+            return int(dict(line.split(': ') for line in f.read().splitlines())['rchar'])
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def load_with(mode, xmind_file):
+    if mode == 'xmind.load':
+        import xmind
+        return xmind.load(xmind_file).getData()
+
+    from xmind2testcase.loader import load_workbook
+    if mode == 'full-file hash':
+        sha256 = hashlib.sha256()
+        with open(xmind_file, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                sha256.update(chunk)
+    else:
+        from xmind2testcase.artifact import get_content_hash
+        get_content_hash(xmind_file)
+    return load_workbook(xmind_file)
+
+
+def run_worker(mode, xmind_file):
+    """Load the file in this process and print the measures as JSON"""
+    # import everything first, so only the loading itself is measured
+    import xmind  # noqa: F401
+    import xmind2testcase.artifact  # noqa: F401
+
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    bytes_before = read_bytes()
+    load_with(mode, xmind_file)
+    bytes_after = read_bytes()
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({'read_bytes': None if bytes_before is None else bytes_after - bytes_before,
+                      'rss_kib': rss_after - rss_before}))
+
+
+def measure(mode, xmind_file):
+    output = subprocess.check_output([sys.executable, '-m', 'benchmarks.bench_attachments', '--worker', mode,
+                                      xmind_file], universal_newlines=True)
+    return json.loads(output.splitlines()[-1])
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='Compare the I/O and the memory of loading image-heavy files')
+    arg_parser.add_argument('--images', type=int, default=20)
+    arg_parser.add_argument('--image-size', type=int, default=256 * 1024)
+    arg_parser.add_argument('--breadth', type=int, default=6)
+    arg_parser.add_argument('--depth', type=int, default=2)
+    arg_parser.add_argument('--worker', nargs=2, metavar=('MODE', 'XMIND_FILE'), help=argparse.SUPPRESS)
+    args = arg_parser.parse_args()
+
+    if args.worker:
+        run_worker(*args.worker)
+        return
+
+    workbook = gen_workbook(1, args.breadth, args.depth)
+    print('testcases: %d, images: %d x %d bytes' % (count_testcases(1, args.breadth, args.depth), args.images,
+                                                      args.image_size))
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for fmt in (XMIND_8, XMIND_ZEN):
+            xmind_file = write_xmind(os.path.join(tmp_dir, fmt + '.xmind'), workbook, fmt,
+                                     attachments=args.images, attachment_size=args.image_size)
+            print('%s file size: %d bytes' % (fmt, os.path.getsize(xmind_file)))
+            for mode in MODES:
+                if mode == 'xmind.load' and fmt == XMIND_ZEN:
+                    continue  # the xmind package can't read the content.json of XMind Zen files
+                result = measure(mode, xmind_file)
+                read = '-' if result['read_bytes'] is None else '%d' % result['read_bytes']
+                print('  %-16s read: %12s bytes  rss: +%8d KiB' % (mode, read, result['rss_kib']))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,43 @@
+#!/usr/bin/env python
+# _*_ coding:utf-8 _*_
+import argparse
+import os
+import tempfile
+import timeit
+
+from benchmarks.generator import gen_workbook, write_xmind, count_testcases, XMIND_8, XMIND_ZEN
+from xmind2testcase.loader import load_workbook
+
+"""
+Compare the loading time of XMind 8 (content.xml) and XMind Zen (content.json) files with the same content
+
+Usage:
+ python -m benchmarks.bench_loader [--breadth 6] [--depth 3] [--repeat 5]
+"""
+
+
+def bench_load(path, repeat):
+    return min(timeit.repeat(lambda: load_workbook(path), number=1, repeat=repeat))
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='Compare the loading time of XMind 8 and XMind Zen files')
+    arg_parser.add_argument('--sheets', type=int, default=1)
+    arg_parser.add_argument('--breadth', type=int, default=6)
+    arg_parser.add_argument('--depth', type=int, default=3)
+    arg_parser.add_argument('--steps', type=int, default=3)
+    arg_parser.add_argument('--repeat', type=int, default=5)
+    args = arg_parser.parse_args()
+
+    workbook = gen_workbook(args.sheets, args.breadth, args.depth, args.steps)
+    print('testcases: %d' % count_testcases(args.sheets, args.breadth, args.depth))
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for fmt in (XMIND_8, XMIND_ZEN):
+            path = write_xmind(os.path.join(tmp_dir, fmt + '.xmind'), workbook, fmt)
+            assert load_workbook(path) == workbook, 'the %s file is loaded with different data' % fmt
+            print('%-8s size: %8d bytes  load: %8.2f ms' % (fmt, os.path.getsize(path), bench_load(path, args.repeat) * 1000))
+
+
+if __name__ == '__main__':
+    main()
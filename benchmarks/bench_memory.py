@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+# _*_ coding:utf-8 _*_
+import argparse
+import gc
+import tracemalloc
+
+from benchmarks.generator import gen_workbook
+from xmind2testcase.metadata import TestCase, TestStep
+from xmind2testcase.parser import xmind_to_testsuites
+
+"""
+Measure the memory footprint per testcase of the parsed model on a synthetic workbook (50k testcases by default)
+
+The parsed testcases are copied into the slotted models and into plain `__dict__` models like the former ones,
+sharing the same field values, so the difference is the footprint of the model objects themselves.
+
+Usage:
+ python -m benchmarks.bench_memory [--breadth 37] [--depth 2] [--steps 3]
+"""
+
+
+class DictTestCase(object):
+    def __init__(self, **fields):
+        self.__dict__.update(fields)
+
+
+class DictTestStep(object):
+    def __init__(self, **fields):
+        self.__dict__.update(fields)
+
+
+CASE_FIELDS = ('name', 'version', 'summary', 'preconditions', 'execution_type', 'importance',
+               'estimated_exec_duration', 'status', 'result')
+STEP_FIELDS = ('step_number', 'actions', 'expected_results', 'execution_type', 'result')
+
+
+def copy_testcases(testcases, case_cls, step_cls):
+    copies = []
+    for case in testcases:
+        steps = [step_cls(**{field: getattr(step, field) for field in STEP_FIELDS}) for step in case.steps or []]
+        copies.append(case_cls(steps=steps, **{field: getattr(case, field) for field in CASE_FIELDS}))
+    return copies
+
+
+def measure(func, *args):
+    """Return the result of the call and the memory it still holds"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = func(*args)
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, after - before
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='Measure the memory footprint per testcase of the parsed model')
+    arg_parser.add_argument('--sheets', type=int, default=1)
+    arg_parser.add_argument('--breadth', type=int, default=37)
+    arg_parser.add_argument('--depth', type=int, default=2)
+    arg_parser.add_argument('--steps', type=int, default=3)
+    args = arg_parser.parse_args()
+
+    workbook = gen_workbook(args.sheets, args.breadth, args.depth, args.steps)
+    testsuites, parsed_size = measure(xmind_to_testsuites, workbook)
+    testcases = [case for testsuite in testsuites for suite in testsuite.sub_suites for case in suite.testcase_list]
+    case_num = len(testcases)
+    print('testcases: %d, steps per testcase: %d' % (case_num, args.steps))
+    print('%-24s %10.1f bytes/testcase' % ('parsed workbook', parsed_size / case_num))
+
+    slotted, slotted_size = measure(copy_testcases, testcases, TestCase, TestStep)
+    del slotted
+    legacy, legacy_size = measure(copy_testcases, testcases, DictTestCase, DictTestStep)
+    del legacy
+
+    print('%-24s %10.1f bytes/testcase' % ('__dict__ models', legacy_size / case_num))
+    print('%-24s %10.1f bytes/testcase' % ('slotted models', slotted_size / case_num))
+    print('%-24s %9.1f%%' % ('reduction', (1 - slotted_size / legacy_size) * 100))
+
+
+if __name__ == '__main__':
+    main()
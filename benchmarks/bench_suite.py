@@ -0,0 +1,160 @@
+#!/usr/bin/env python
+# _*_ coding:utf-8 _*_
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import tempfile
+import timeit
+import tracemalloc
+
+from benchmarks.generator import gen_workbook, get_shape, write_xmind, count_testcases, XMIND_8, XMIND_ZEN
+from xmind2testcase.__about__ import __version__
+from xmind2testcase.artifact import remove_artifact
+from xmind2testcase.parser import xmind_to_testsuites
+from xmind2testcase.testlink import testsuites_to_xml_content
+from xmind2testcase.utils import get_xmind_testcase_list, load_xmind_content, workbook_cache
+from xmind2testcase.zentao import xmind_to_zentao_csv_file, METERSPHERE_HIDE_COLUMNS, METERSPHERE_COLUMN_WIDTHS, \
+    METERSPHERE_STYLE
+
+"""
+Time and memory-profile the parser and the exporters on synthetic workbooks from 100 to 100k testcases
+
+Every function is timed cold (no parsed workbook cache, no up to date output file) `--repeat` times,
+then run once more under tracemalloc for its peak memory. The results are written as JSON,
+sorted and without timestamps, so the files of two releases can be diffed directly.
+
+Usage:
+ python -m benchmarks.bench_suite [--sizes 100,1000,10000,100000] [--repeat 3] [--format xmind8] [--output results.json]
+"""
+
+DEFAULT_SIZES = (100, 1000, 10000, 100000)
+
+
+def gen_benchmarks(xmind_file, tmp_dir):
+    """Return [(name, setup, func)], the setup prepares a cold run and returns the arguments of the function"""
+    csv_file = os.path.join(tmp_dir, 'bench.csv')
+    xlsx_file = os.path.join(tmp_dir, 'bench.xlsx')
+
+    def cold_cache():
+        workbook_cache.clear()
+        return (xmind_file,)
+
+    def loaded_content():
+        return (load_xmind_content(xmind_file),)
+
+    def parsed_testsuites():
+        return (xmind_to_testsuites(load_xmind_content(xmind_file)),)
+
+    def stale_csv():
+        workbook_cache.clear()
+        remove_artifact(os.path.splitext(xmind_file)[0] + '.csv')
+        return (xmind_file,)
+
+    def zentao_csv():
+        workbook_cache.clear()
+        remove_artifact(os.path.splitext(xmind_file)[0] + '.csv')
+        os.replace(xmind_to_zentao_csv_file(xmind_file), csv_file)
+        return csv_file, xlsx_file, METERSPHERE_HIDE_COLUMNS, METERSPHERE_COLUMN_WIDTHS, METERSPHERE_STYLE
+
+    benchmarks = [
+        ('xmind_to_testsuites', loaded_content, xmind_to_testsuites),
+        ('get_xmind_testcase_list', cold_cache, get_xmind_testcase_list),
+        ('testsuites_to_xml_content', parsed_testsuites, testsuites_to_xml_content),
+        ('xmind_to_zentao_csv_file', stale_csv, xmind_to_zentao_csv_file),
+    ]
+
+    try:
+        # openpyxl is optional for the rest of the benchmarks
+        from Utils.Excelize import csv_2_excel
+    except ImportError:
+        pass
+    else:
+        benchmarks.append(('csv_2_excel', zentao_csv, csv_2_excel))
+
+    return benchmarks
+
+
+def measure_time(setup, func, repeat):
+    """Return the seconds of every cold run, the setup is not timed"""
+    timings = []
+    for _ in range(repeat):
+        args = setup()
+        gc.collect()
+        timings.append(timeit.timeit(lambda: func(*args), number=1))
+    return timings
+
+
+def measure_peak(setup, func):
+    """Return the peak traced memory in bytes of a cold run, the memory held by its arguments excluded"""
+    args = setup()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func(*args)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def bench_size(cases, args, tmp_dir):
+    breadth, depth = get_shape(cases, args.breadth)
+    workbook = gen_workbook(1, breadth, depth, args.steps, notes=True, comments=True, labels=True, markers=True)
+    xmind_file = write_xmind(os.path.join(tmp_dir, 'bench.xmind'), workbook, args.format)
+    del workbook
+    testcase_count = count_testcases(1, breadth, depth)
+
+    results = []
+    for name, setup, func in gen_benchmarks(xmind_file, tmp_dir):
+        timings = measure_time(setup, func, args.repeat)
+        peak = measure_peak(setup, func)
+        results.append({
+            'function': name,
+            'cases': testcase_count,
+            'min_ms': round(min(timings) * 1000, 3),
+            'mean_ms': round(sum(timings) / len(timings) * 1000, 3),
+            'peak_bytes': peak,
+            'us_per_case': round(min(timings) * 1e6 / testcase_count, 3),
+            'bytes_per_case': round(peak / testcase_count, 1),
+        })
+        print('%-28s %8d cases %12.2f ms %14d bytes peak' % (name, testcase_count, min(timings) * 1000, peak),
+              file=sys.stderr)
+    workbook_cache.clear()
+    return {'cases': testcase_count, 'breadth': breadth, 'depth': depth,
+            'file_size': os.path.getsize(xmind_file), 'results': results}
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='Benchmark the parser and the exporters on synthetic workbooks')
+    arg_parser.add_argument('--sizes', default=','.join(str(size) for size in DEFAULT_SIZES),
+                            help='the comma separated numbers of testcases, rounded to breadth ** n')
+    arg_parser.add_argument('--breadth', type=int, default=10)
+    arg_parser.add_argument('--steps', type=int, default=3)
+    arg_parser.add_argument('--repeat', type=int, default=3)
+    arg_parser.add_argument('--format', choices=(XMIND_8, XMIND_ZEN), default=XMIND_8)
+    arg_parser.add_argument('--output', help='the JSON result file, stdout by default')
+    args = arg_parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(',')]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        runs = [bench_size(cases, args, tmp_dir) for cases in sizes]
+
+    report = {
+        'version': __version__,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'params': {'breadth': args.breadth, 'steps': args.steps, 'repeat': args.repeat, 'format': args.format},
+        'sizes': runs,
+    }
+    text = json.dumps(report, ensure_ascii=False, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, 'w', encoding='utf8') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,186 @@
+#!/usr/bin/env python
+# _*_ coding:utf-8 _*_
+import json
+import random
+import zipfile
+from xml.etree.ElementTree import Element, SubElement, tostring
+
+"""
+Generate deterministic synthetic XMind files for benchmarks
+
+A sheet's root topic holds `breadth` testsuites, every testsuite nests `depth` levels of `breadth` module topics,
+and every leaf is a testcase with `steps` step topics, each step has one expected result topic.
+So a workbook has sheets * breadth ** (depth + 1) testcases.
+
+Optionally the testcases get notes (preconditions), comments (summaries), labels (execution types)
+and test result markers, taken in turn from fixed lists so the same arguments always give the same workbook.
+The files may also embed attachments of seeded random (incompressible, like images) bytes.
+"""
+
+XMIND_8 = 'xmind8'
+XMIND_ZEN = 'zen'
+
+NS_CONTENT = 'urn:xmind:xmap:xmlns:content:2.0'
+NS_MANIFEST = 'urn:xmind:xmap:xmlns:manifest:1.0'
+NS_COMMENTS = 'urn:xmind:xmap:xmlns:comments:2.0'
+
+LABELS = ('手动', '自动')
+RESULT_MARKERS = ('symbol-right', 'symbol-wrong', 'symbol-pause', 'symbol-minus')
+
+
+def count_testcases(sheets=1, breadth=4, depth=2):
+    return sheets * breadth ** (depth + 1)
+
+
+def get_shape(cases, breadth=10):
+    """Return the (breadth, depth) of a one sheet workbook with about that many testcases"""
+    depth = 0
+    while breadth ** (depth + 2) <= cases * breadth ** 0.5:
+        depth += 1
+    return breadth, depth
+
+
+def gen_workbook(sheets=1, breadth=4, depth=2, steps=3, notes=False, comments=False, labels=False, markers=False):
+    """Generate the sheet dict data of a synthetic workbook, in the shape of `xmind.load().getData()`
+
+    :param notes: give every testcase a note, parsed as its preconditions
+    :param comments: give every testcase a JSON comment, parsed as its summary
+    :param labels: give every testcase a label, parsed as its execution type
+    :param markers: give every testcase a test result marker besides its priority marker
+    """
+    counter = [0]
+
+    def new_topic(title, markers=None):
+        counter[0] += 1
+        return {'id': 'topic%022d' % counter[0], 'title': title, 'note': None, 'label': None, 'comment': None,
+                'markers': markers or []}
+
+    def gen_module(parent, level, path):
+        for index in range(1, breadth + 1):
+            name = '%s.%d' % (path, index)
+            if level == depth:
+                case_markers = ['priority-%d' % (index % 3 + 1)]
+                if markers:
+                    case_markers.append(RESULT_MARKERS[index % len(RESULT_MARKERS)])
+                case = new_topic('用例 %s' % name, case_markers)
+                if notes:
+                    case['note'] = '前置条件：已进入%s页面' % name
+                if comments:
+                    case['comment'] = json.dumps({'summary': '用例 %s 的摘要' % name}, ensure_ascii=False)
+                if labels:
+                    case['label'] = LABELS[index % len(LABELS)]
+                case['topics'] = []
+                for step_num in range(1, steps + 1):
+                    step = new_topic('步骤 %d：操作 %s' % (step_num, name))
+                    step['topics'] = [new_topic('预期结果 %d' % step_num)]
+                    case['topics'].append(step)
+                parent.setdefault('topics', []).append(case)
+            else:
+                module = new_topic('模块 %s' % name)
+                gen_module(module, level + 1, name)
+                parent.setdefault('topics', []).append(module)
+
+    workbook = []
+    for sheet_num in range(1, sheets + 1):
+        root_topic = new_topic('产品 %d>' % sheet_num)
+        gen_module(root_topic, 0, str(sheet_num))
+        workbook.append({'id': 'sheet%022d' % sheet_num, 'title': '画布 %d' % sheet_num, 'topic': root_topic})
+
+    return workbook
+
+
+def write_xmind(path, workbook, fmt=XMIND_8, attachments=0, attachment_size=256 * 1024):
+    """Write the sheet dict data to a XMind 8 (content.xml) or XMind Zen (content.json) file
+
+    :param attachments: the number of embedded images under attachments/
+    :param attachment_size: the bytes of every image
+    """
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as zf:
+        for index in range(attachments):
+            zf.writestr('attachments/image%d.png' % index, random.Random(index).randbytes(attachment_size))
+        if fmt == XMIND_ZEN:
+            zf.writestr('content.json', json.dumps(workbook_to_json(workbook), ensure_ascii=False))
+            zf.writestr('metadata.json', json.dumps({'dataStructureVersion': '2'}))
+            zf.writestr('manifest.json', json.dumps({'file-entries': {'content.json': {}, 'metadata.json': {}}}))
+        else:
+            zf.writestr('content.xml', workbook_to_xml(workbook))
+            entries = ['content.xml', 'META-INF/']
+            comments = comments_xml(workbook)
+            if comments is not None:
+                zf.writestr('comments.xml', comments)
+                entries.append('comments.xml')
+            zf.writestr('META-INF/manifest.xml', manifest_xml(entries))
+    return path
+
+
+def workbook_to_xml(workbook):
+    root = Element('xmap-content', {'xmlns': NS_CONTENT, 'version': '2.0'})
+    for sheet in workbook:
+        sheet_element = SubElement(root, 'sheet', {'id': sheet['id']})
+        _topic_to_xml(sheet_element, sheet['topic'])
+        SubElement(sheet_element, 'title').text = sheet['title']
+    return b'<?xml version="1.0" encoding="UTF-8" standalone="no"?>' + tostring(root, encoding='utf-8')
+
+
+def _topic_to_xml(parent_element, topic):
+    topic_element = SubElement(parent_element, 'topic', {'id': topic['id']})
+    SubElement(topic_element, 'title').text = topic['title']
+
+    if topic['note']:
+        notes = SubElement(topic_element, 'notes')
+        SubElement(notes, 'plain').text = topic['note']
+    if topic['label']:
+        labels = SubElement(topic_element, 'labels')
+        SubElement(labels, 'label').text = topic['label']
+    if topic['markers']:
+        marker_refs = SubElement(topic_element, 'marker-refs')
+        for marker in topic['markers']:
+            SubElement(marker_refs, 'marker-ref', {'marker-id': marker})
+    if topic.get('topics'):
+        children = SubElement(topic_element, 'children')
+        topics = SubElement(children, 'topics', {'type': 'attached'})
+        for sub_topic in topic['topics']:
+            _topic_to_xml(topics, sub_topic)
+
+
+def workbook_to_json(workbook):
+    return [{'id': sheet['id'], 'class': 'sheet', 'title': sheet['title'], 'rootTopic': _topic_to_json(sheet['topic'])}
+            for sheet in workbook]
+
+
+def comments_xml(workbook):
+    """The comments.xml of the topics' comments, None if there are none"""
+    root = Element('comments', {'xmlns': NS_COMMENTS, 'version': '2.0'})
+    stack = [sheet['topic'] for sheet in workbook]
+    while stack:
+        topic = stack.pop()
+        if topic['comment']:
+            comment = SubElement(root, 'comment', {'author': 'benchmark', 'object-id': topic['id'], 'time': '0'})
+            SubElement(comment, 'content').text = topic['comment']
+        stack.extend(topic.get('topics', []))
+    if not len(root):
+        return None
+    return b'<?xml version="1.0" encoding="UTF-8" standalone="no"?>' + tostring(root, encoding='utf-8')
+
+
+def _topic_to_json(topic):
+    data = {'id': topic['id'], 'class': 'topic', 'title': topic['title']}
+
+    if topic['note']:
+        data['notes'] = {'plain': {'content': topic['note']}}
+    if topic['label']:
+        data['labels'] = [topic['label']]
+    if topic['comment']:
+        data['comments'] = [{'author': 'benchmark', 'content': topic['comment']}]
+    if topic['markers']:
+        data['markers'] = [{'markerId': marker} for marker in topic['markers']]
+    if topic.get('topics'):
+        data['children'] = {'attached': [_topic_to_json(sub_topic) for sub_topic in topic['topics']]}
+    return data
+
+
+def manifest_xml(entries):
+    root = Element('manifest', {'xmlns': NS_MANIFEST})
+    for entry in entries:
+        SubElement(root, 'file-entry', {'full-path': entry, 'media-type': ''})
+    return b'<?xml version="1.0" encoding="UTF-8" standalone="no"?>' + tostring(root, encoding='utf-8')
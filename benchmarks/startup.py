@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+# _*_ coding:utf-8 _*_
+import argparse
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+"""
+Check the cold start of `xmind2testcase file.xmind -csv` against a fixed import time budget
+
+The conversion runs in a fresh interpreter with `-X importtime`, the cumulative import time of `xmind2testcase.cli`
+must stay under the budget, and none of the heavy dependencies of the other code paths may be imported at all.
+Exit with status 1 if the check fails, so it can guard a CI job.
+
+Usage:
+ python -m benchmarks.startup [--budget 100] [--repeat 3] [--xmind docs/xmind_testcase_template_v1.1.xmind]
+"""
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_XMIND = os.path.join(ROOT_DIR, 'docs', 'xmind_testcase_template_v1.1.xmind')
+DEFAULT_BUDGET_MS = 100
+
+# only the webtool, the xlsx files or a parallel parse need them
+FORBIDDEN_MODULES = ('xmind', 'flask', 'werkzeug', 'jinja2', 'arrow', 'sqlite3', 'openpyxl', 'pydantic', 'icecream',
+                     'webtool', 'multiprocessing', 'Utils')
+
+CSV_COMMAND = 'import sys; from xmind2testcase.cli import cli_main; sys.argv = ["xmind2testcase", sys.argv[1], "-csv"]; ' \
+              'cli_main()'
+IMPORT_TIME_RE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+
+def parse_import_time(stderr):
+    """Return {module: cumulative import time in µs} from the `-X importtime` output"""
+    modules = {}
+    for line in stderr.splitlines():
+        match = IMPORT_TIME_RE.match(line)
+        if match:
+            modules[match.group(4)] = int(match.group(2))
+    return modules
+
+
+def run_csv(xmind_file):
+    """Convert the file to csv in a fresh interpreter, return the imported modules and the wall time in seconds"""
+    start = time.perf_counter()
+    process = subprocess.run([sys.executable, '-X', 'importtime', '-c', CSV_COMMAND, xmind_file], cwd=ROOT_DIR,
+                             stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+    elapsed = time.perf_counter() - start
+    if process.returncode != 0:
+        raise RuntimeError('Failed to convert %s:\n%s' % (xmind_file, process.stderr))
+    return parse_import_time(process.stderr), elapsed
+
+
+def run_bare(repeat):
+    """The wall time of an interpreter doing nothing, the floor of any cold start"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', 'pass'], check=True)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='Check the cold start of the csv conversion')
+    arg_parser.add_argument('--xmind', default=DEFAULT_XMIND)
+    arg_parser.add_argument('--budget', type=float, default=DEFAULT_BUDGET_MS,
+                            help='the import time budget of xmind2testcase.cli in ms')
+    arg_parser.add_argument('--repeat', type=int, default=3)
+    args = arg_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        xmind_file = shutil.copy(args.xmind, tmp_dir)
+        runs = [run_csv(xmind_file) for _ in range(args.repeat)]
+
+    modules = runs[-1][0]
+    import_ms = min(run_modules['xmind2testcase.cli'] for run_modules, _ in runs) / 1000
+    wall_ms = min(elapsed for _, elapsed in runs) * 1000
+    bare_ms = run_bare(args.repeat) * 1000
+    print('%-28s %8.2f ms' % ('bare interpreter', bare_ms))
+    print('%-28s %8.2f ms' % ('csv conversion', wall_ms))
+    print('%-28s %8.2f ms  (budget %.2f ms)' % ('import xmind2testcase.cli', import_ms, args.budget))
+
+    failures = []
+    if import_ms > args.budget:
+        failures.append('importing xmind2testcase.cli takes %.2f ms, over the budget of %.2f ms' % (import_ms, args.budget))
+    heavy_modules = sorted({module.split('.')[0] for module in modules} & set(FORBIDDEN_MODULES))
+    if heavy_modules:
+        failures.append('heavy modules are imported: %s' % ', '.join(heavy_modules))
+
+    for failure in failures:
+        print('FAIL: ' + failure)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -15,7 +15,6 @@ with io.open('README.md', encoding='utf-8') as f:
     long_description = f.read()
 
 install_requires = [  # custom
-    "xmind",
     "flask",
     "arrow",
 ]
@@ -77,13 +76,16 @@ setup(
     author_email=about['__author_email__'],
     url=about['__url__'],
     license=about['__license__'],
-    packages=find_packages(exclude=['tests', 'test.*', 'docs']),  # custom
+    packages=find_packages(exclude=['tests', 'test.*', 'docs', 'benchmarks', 'benchmarks.*']),  # custom
     package_data={  # custom
         '': ['README.md'],
         'webtool': ['static/*', 'static/css/*', 'static/guide/*', 'templates/*', 'schema.sql'],
     },
     install_requires=install_requires,
-    extras_require={},
+    extras_require={
+        'speedups': ['orjson'],
+        'xlsx': ['openpyxl'],
+    },
     python_requires='>=3.0, <4',  # custom
     classifiers=[
         "Programming Language :: Python :: 3",
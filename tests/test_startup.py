@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+# _*_ coding:utf-8 _*_
+import os
+import re
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+"""
+Guard the lazy imports of the command line: `xmind2testcase.cli` is imported in a fresh interpreter
+with `-X importtime`, its cumulative import time must stay under the budget, and the heavy dependencies
+of the other code paths must not be imported at all. See `benchmarks/startup.py` for the full report.
+"""
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMPORT_BUDGET_MS = 100
+REPEAT = 3
+
+# only the webtool, the xlsx files or a parallel parse need them
+FORBIDDEN_MODULES = ('xmind', 'flask', 'werkzeug', 'jinja2', 'arrow', 'sqlite3', 'openpyxl', 'pydantic', 'icecream',
+                     'webtool', 'multiprocessing', 'Utils')
+
+IMPORT_TIME_RE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+
+def import_modules(code, *args):
+    """Run the code in a fresh interpreter, return {module: cumulative import time in µs}"""
+    process = subprocess.run([sys.executable, '-X', 'importtime', '-c', code] + list(args), cwd=ROOT_DIR,
+                             stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+    assert process.returncode == 0, process.stderr
+    modules = {}
+    for line in process.stderr.splitlines():
+        match = IMPORT_TIME_RE.match(line)
+        if match:
+            modules[match.group(4)] = int(match.group(2))
+    return modules
+
+
+def get_heavy_modules(modules):
+    return sorted({module.split('.')[0] for module in modules} & set(FORBIDDEN_MODULES))
+
+
+def test_cli_import_time():
+    runs = [import_modules('import xmind2testcase.cli') for _ in range(REPEAT)]
+    import_ms = min(modules['xmind2testcase.cli'] for modules in runs) / 1000
+    assert import_ms <= IMPORT_BUDGET_MS, 'importing xmind2testcase.cli takes %.2f ms, over the budget of %d ms' % (
+        import_ms, IMPORT_BUDGET_MS)
+
+
+def test_cli_import_skips_heavy_modules():
+    assert get_heavy_modules(import_modules('import xmind2testcase.cli')) == []
+
+
+@pytest.mark.parametrize('fmt', ['-csv', '-xml', '-json'])
+def test_conversion_skips_heavy_modules(tmpdir, fmt):
+    xmind_file = shutil.copy(os.path.join(ROOT_DIR, 'docs', 'xmind_testcase_template_v1.1.xmind'), str(tmpdir))
+    code = 'import sys; from xmind2testcase.cli import cli_main; sys.argv = ["xmind2testcase"] + sys.argv[1:]; ' \
+           'cli_main()'
+    assert get_heavy_modules(import_modules(code, xmind_file, fmt)) == []
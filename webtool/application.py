@@ -8,9 +8,11 @@ import sqlite3
 from contextlib import closing
 from os.path import join, exists
 from werkzeug.utils import secure_filename
+from xmind2testcase.artifact import remove_artifact, get_content_hash
 from xmind2testcase.zentao import xmind_to_zentao_csv_file
 from xmind2testcase.testlink import xmind_to_testlink_xml_file
-from xmind2testcase.utils import get_xmind_testsuites, get_xmind_testcase_list
+from xmind2testcase.utils import get_xmind_testsuites, iter_testsuites_testcases, workbook_cache
+from webtool.cache import ParseResult, ParseResultCache
 from flask import Flask, request, send_from_directory, g, render_template, abort, redirect, url_for
 
 here = os.path.abspath(os.path.dirname(__file__))
@@ -40,12 +42,17 @@ ALLOWED_EXTENSIONS = ['xmind']
 DEBUG = True
 DATABASE = os.path.join(here, 'data.db3')
 HOST = '0.0.0.0'
+PARSE_CACHE_SIZE = 32  # the number of parse results kept in memory
+PARSE_CACHE_DIR = None  # spill the evicted parse results to this directory, e.g. os.path.join(here, 'parse_cache')
 
 # flask app
 app = Flask(__name__)
 app.config.from_object(__name__)
 app.secret_key = os.urandom(32)
 
+# the parse results of the uploads, shared by the preview and download pages
+parse_cache = ParseResultCache(max_entries=PARSE_CACHE_SIZE, spill_dir=PARSE_CACHE_DIR)
+
 
 def connect_db():
     return sqlite3.connect(app.config['DATABASE'])
@@ -86,6 +93,47 @@ def insert_record(xmind_name, note=''):
     sql = "INSERT INTO records (name,create_on,note) VALUES (?,?,?)"
     c.execute(sql, (xmind_name, now, str(note)))
     g.db.commit()
+    return c.lastrowid
+
+
+def get_record_id(xmind_name):
+    c = g.db.cursor()
+    sql = "SELECT id FROM records WHERE name = ? AND is_deleted<>1 ORDER BY id DESC LIMIT 1"
+    c.execute(sql, (xmind_name,))
+    row = c.fetchone()
+    return row[0] if row else None
+
+
+def parse_upload(record_id, filename):
+    """Parse the uploaded XMind file once, write its testlink and zentao files, and cache the result"""
+    full_path = join(app.config['UPLOAD_FOLDER'], filename)
+    source = get_content_hash(full_path)
+    # the parse result holds everything the pages need, the parsed workbook doesn't need to stay cached too
+    testsuites = get_xmind_testsuites(full_path, use_cache=False)
+    suite_count = sum(len(suite.sub_suites) for suite in testsuites)
+    testcases = list(iter_testsuites_testcases(testsuites))
+    outputs = {
+        'testlink': os.path.basename(xmind_to_testlink_xml_file(full_path, testsuites=testsuites)),
+        'zentao': os.path.basename(xmind_to_zentao_csv_file(full_path, testsuites=testsuites)),
+    }
+
+    result = ParseResult(record_id, source, suite_count, testcases, outputs)
+    parse_cache.put(result)
+    return result
+
+
+def get_parse_result(filename):
+    """Return the cached parse result of an upload, parse it again only if it's evicted or the file changed"""
+    full_path = join(app.config['UPLOAD_FOLDER'], filename)
+    record_id = get_record_id(filename)
+    if record_id is None or not exists(full_path):
+        abort(404)
+
+    result = parse_cache.get(record_id, get_content_hash(full_path))
+    if result is None or not all(exists(join(app.config['UPLOAD_FOLDER'], f)) for f in result.outputs.values()):
+        app.logger.info('The parse result of %s is not cached, parse it again', filename)
+        result = parse_upload(record_id, filename)
+    return result
 
 
 def delete_record(filename, record_id):
@@ -93,9 +141,12 @@ def delete_record(filename, record_id):
     testlink_file = join(app.config['UPLOAD_FOLDER'], filename[:-5] + 'xml')
     zentao_file = join(app.config['UPLOAD_FOLDER'], filename[:-5] + 'csv')
 
-    for f in [xmind_file, testlink_file, zentao_file]:
-        if exists(f):
-            os.remove(f)
+    if exists(xmind_file):
+        os.remove(xmind_file)
+    for f in [testlink_file, zentao_file]:
+        remove_artifact(f)
+    workbook_cache.discard(xmind_file)
+    parse_cache.discard(record_id)
 
     c = g.db.cursor()
     sql = 'UPDATE records SET is_deleted=1 WHERE id = ?'
@@ -116,9 +167,12 @@ def delete_records(keep=20):
         testlink_file = join(app.config['UPLOAD_FOLDER'], name[:-5] + 'xml')
         zentao_file = join(app.config['UPLOAD_FOLDER'], name[:-5] + 'csv')
 
-        for f in [xmind_file, testlink_file, zentao_file]:
-            if exists(f):
-                os.remove(f)
+        if exists(xmind_file):
+            os.remove(xmind_file)
+        for f in [testlink_file, zentao_file]:
+            remove_artifact(f)
+        workbook_cache.discard(xmind_file)
+        parse_cache.discard(row[0])
 
         sql = 'UPDATE records SET is_deleted=1 WHERE id = ?'
         c.execute(sql, (row[0],))
@@ -174,7 +228,8 @@ def save_file(file):
             upload_to = join(app.config['UPLOAD_FOLDER'], filename)
 
         file.save(upload_to)
-        insert_record(filename)
+        record_id = insert_record(filename)
+        parse_upload(record_id, filename)
         g.is_success = True
         return filename
 
@@ -232,45 +287,20 @@ def uploaded_file(filename):
 
 @app.route('/<filename>/to/testlink')
 def download_testlink_file(filename):
-    full_path = join(app.config['UPLOAD_FOLDER'], filename)
-
-    if not exists(full_path):
-        abort(404)
-
-    testlink_xmls_file = xmind_to_testlink_xml_file(full_path)
-    filename = os.path.basename(testlink_xmls_file) if testlink_xmls_file else abort(404)
-
-    return send_from_directory(app.config['UPLOAD_FOLDER'], filename, as_attachment=True)
+    result = get_parse_result(filename)
+    return send_from_directory(app.config['UPLOAD_FOLDER'], result.outputs['testlink'], as_attachment=True)
 
 
 @app.route('/<filename>/to/zentao')
 def download_zentao_file(filename):
-    full_path = join(app.config['UPLOAD_FOLDER'], filename)
-
-    if not exists(full_path):
-        abort(404)
-
-    zentao_csv_file = xmind_to_zentao_csv_file(full_path)
-    filename = os.path.basename(zentao_csv_file) if zentao_csv_file else abort(404)
-
-    return send_from_directory(app.config['UPLOAD_FOLDER'], filename, as_attachment=True)
+    result = get_parse_result(filename)
+    return send_from_directory(app.config['UPLOAD_FOLDER'], result.outputs['zentao'], as_attachment=True)
 
 
 @app.route('/preview/<filename>')
 def preview_file(filename):
-    full_path = join(app.config['UPLOAD_FOLDER'], filename)
-
-    if not exists(full_path):
-        abort(404)
-
-    testsuites = get_xmind_testsuites(full_path)
-    suite_count = 0
-    for suite in testsuites:
-        suite_count += len(suite.sub_suites)
-
-    testcases = get_xmind_testcase_list(full_path)
-
-    return render_template('preview.html', name=filename, suite=testcases, suite_count=suite_count)
+    result = get_parse_result(filename)
+    return render_template('preview.html', name=filename, suite=result.testcases, suite_count=result.suite_count)
 
 
 @app.route('/delete/<filename>/<int:record_id>')
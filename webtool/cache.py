@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+# _*_ coding:utf-8 _*_
+import glob
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict, namedtuple
+
+"""
+Cache the parse results of the uploaded XMind files, so the preview and download pages never parse them again
+
+A result is keyed by the record id and the content hash of the upload, an entry of a replaced file is never served.
+The cache is bounded by entries and by testcases, the evicted results are spilled to JSON files
+if a spill directory is given, and read back from there on a miss.
+"""
+
+# suite_count: the number of testsuites, testcases: the testcase data list of the preview,
+# outputs: {'testlink': xml file name, 'zentao': csv file name} in the upload folder
+ParseResult = namedtuple('ParseResult', ['record_id', 'source', 'suite_count', 'testcases', 'outputs'])
+
+
+class ParseResultCache(object):
+    """A thread-safe LRU cache of `ParseResult`, with an optional on-disk spill"""
+
+    def __init__(self, max_entries=32, max_testcases=100000, spill_dir=None):
+        """
+        ParseResultCache
+        :param max_entries: the maximum number of results in memory
+        :param max_testcases: the maximum number of testcases of all the results in memory
+        :param spill_dir: the directory of the evicted results, no spill by default
+        """
+        self.max_entries = max_entries
+        self.max_testcases = max_testcases
+        self.spill_dir = spill_dir
+        self._entries = OrderedDict()  # (record id, source) -> result
+        self._total_testcases = 0
+        self._lock = threading.Lock()
+
+        if spill_dir and not os.path.exists(spill_dir):
+            os.makedirs(spill_dir)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, record_id, source):
+        """Return the result of the record's upload with that content hash, or None"""
+        key = (record_id, source)
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+                return result
+
+        result = self._read_spill(record_id, source)
+        if result is not None:
+            logging.debug('read the spilled parse result of record %s', record_id)
+            self.put(result)
+        return result
+
+    def put(self, result):
+        key = (result.record_id, result.source)
+        evicted = []
+        with self._lock:
+            if key in self._entries:
+                self._total_testcases -= len(self._entries.pop(key).testcases)
+            self._entries[key] = result
+            self._total_testcases += len(result.testcases)
+
+            while len(self._entries) > 1 and (len(self._entries) > self.max_entries
+                                              or self._total_testcases > self.max_testcases):
+                _, old_result = self._entries.popitem(last=False)
+                self._total_testcases -= len(old_result.testcases)
+                evicted.append(old_result)
+
+        for old_result in evicted:
+            self._write_spill(old_result)
+
+    def discard(self, record_id):
+        """Drop every result of the record, from memory and from the spill directory"""
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == record_id]:
+                self._total_testcases -= len(self._entries.pop(key).testcases)
+
+        if self.spill_dir:
+            for spill_file in glob.glob(os.path.join(self.spill_dir, '%s-*.json' % record_id)):
+                os.remove(spill_file)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._total_testcases = 0
+
+    def _spill_file(self, record_id, source):
+        return os.path.join(self.spill_dir, '%s-%s.json' % (record_id, source))
+
+    def _write_spill(self, result):
+        if not self.spill_dir:
+            return
+        spill_file = self._spill_file(result.record_id, result.source)
+        temp_file = '%s.%d.tmp' % (spill_file, threading.get_ident())
+        try:
+            with open(temp_file, 'w', encoding='utf8') as f:
+                json.dump(result._asdict(), f, ensure_ascii=False)
+            os.replace(temp_file, spill_file)
+        except OSError as e:
+            logging.warning('Failed to spill the parse result of record %s: %s', result.record_id, e)
+
+    def _read_spill(self, record_id, source):
+        if not self.spill_dir:
+            return None
+        try:
+            with open(self._spill_file(record_id, source), encoding='utf8') as f:
+                return ParseResult(**json.load(f))
+        except (OSError, ValueError, TypeError):
+            return None
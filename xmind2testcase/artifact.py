@@ -0,0 +1,183 @@
+#!/usr/bin/env python
+# _*_ coding:utf-8 _*_
+import hashlib
+import json
+import logging
+import os
+import threading
+import zipfile
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from xmind2testcase.__about__ import __version__
+from xmind2testcase.loader import get_workbook_members
+from xmind2testcase.parser import get_parse_options
+
+"""
+Cache the converted files (testlink xml, zentao csv, json...) next to their XMind file
+
+Every output file has a sidecar `<output>.meta` recording the source content hash, the converter and its options.
+An output is reused only while its sidecar still matches, otherwise it's written to a temp file first
+and renamed over the old one, so a reader never sees a half written file.
+"""
+
+META_SUFFIX = '.meta'
+HASH_CHUNK_SIZE = 1024 * 1024
+
+_regenerating = 0  # the depth of `regenerate_artifacts`
+
+
+class _HashCache(object):
+    """Remember the content hash of files by (path, size, mtime), to skip hashing unchanged files again"""
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            digest = self._entries.get(key)
+            if digest is not None:
+                self._entries.move_to_end(key)
+            return digest
+
+    def put(self, key, digest):
+        with self._lock:
+            self._entries[key] = digest
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+_hash_cache = _HashCache()
+
+
+def get_content_hash(xmind_file):
+    """Return the sha256 hex digest of the workbook content
+
+    Only the members the loader reads are hashed (content and comments), so the images and attachments
+    of the archive are never read, and changing them alone doesn't make the outputs stale.
+    A file which isn't a zip archive is hashed as a whole.
+    """
+    stat = os.stat(xmind_file)
+    key = (os.path.abspath(xmind_file), stat.st_size, stat.st_mtime_ns)
+    digest = _hash_cache.get(key)
+
+    if digest is None:
+        sha256 = hashlib.sha256()
+        try:
+            with zipfile.ZipFile(xmind_file) as zf:
+                for member in get_workbook_members(zf.namelist()):
+                    sha256.update(('%s:%d\n' % (member, zf.getinfo(member).file_size)).encode('utf8'))
+                    with zf.open(member) as f:
+                        _update_hash(sha256, f)
+        except zipfile.BadZipFile:
+            sha256 = hashlib.sha256()
+            with open(xmind_file, 'rb') as f:
+                _update_hash(sha256, f)
+        digest = sha256.hexdigest()
+        _hash_cache.put(key, digest)
+
+    return digest
+
+
+def _update_hash(sha256, f):
+    for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+        sha256.update(chunk)
+
+
+def options_to_dict(options=None):
+    """The JSON-able form of the `ParseOptions`"""
+    options = get_parse_options(options)
+    return {field: ''.join(sorted(value)) if isinstance(value, frozenset) else value
+            for field, value in options._asdict().items()}
+
+
+def gen_artifact_meta(xmind_file, converter, options=None, **params):
+    """
+    The sidecar data of an output file
+    :param converter: the converter name, e.g. 'testlink'
+    :param params: the converter's own options that change the output, e.g. is_all_sheet
+    """
+    return {
+        'version': __version__,
+        'converter': converter,
+        'source': get_content_hash(xmind_file),
+        'options': options_to_dict(options),
+        'params': params,
+    }
+
+
+def get_meta_file(output_file):
+    return output_file + META_SUFFIX
+
+
+def read_artifact_meta(output_file):
+    try:
+        with open(get_meta_file(output_file), encoding='utf8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def is_artifact_fresh(output_file, meta):
+    """Whether the output file exists and was converted from the same content with the same options"""
+    return os.path.exists(output_file) and read_artifact_meta(output_file) == json.loads(json.dumps(meta))
+
+
+def convert_artifact(output_file, meta, write, opener=None):
+    """Reuse the output file if it's fresh, otherwise regenerate it atomically
+
+    :param meta: the sidecar data from `gen_artifact_meta`
+    :param write: a callable writing the output to the given file object
+    :param opener: a callable opening a path as the writable file object, a utf8 text file by default
+    :return: the output file
+    """
+    if not _regenerating and is_artifact_fresh(output_file, meta):
+        logging.info('The output file is up to date, return it directly: %s', output_file)
+        return output_file
+
+    opener = opener or (lambda path: open(path, 'w', encoding='utf8'))
+    meta_file = get_meta_file(output_file)
+    if os.path.exists(meta_file):
+        os.remove(meta_file)
+
+    _replace_file(output_file, lambda path: _write_with(opener, path, write))
+    _replace_file(meta_file, lambda path: _write_with(lambda p: open(p, 'w', encoding='utf8'), path,
+                                                      lambda f: json.dump(meta, f, ensure_ascii=False)))
+    return output_file
+
+
+@contextmanager
+def regenerate_artifacts():
+    """Write the output files again inside the block even if they are fresh, e.g. to profile a conversion"""
+    global _regenerating
+    _regenerating += 1
+    try:
+        yield
+    finally:
+        _regenerating -= 1
+
+
+def remove_artifact(output_file):
+    """Remove the output file and its sidecar"""
+    for f in (output_file, get_meta_file(output_file)):
+        if os.path.exists(f):
+            os.remove(f)
+
+
+def _write_with(opener, path, write):
+    with opener(path) as f:
+        write(f)
+
+
+def _replace_file(target_file, write_to):
+    temp_file = '%s.%d.%d.tmp' % (target_file, os.getpid(), threading.get_ident())
+    try:
+        write_to(temp_file)
+        os.replace(temp_file, target_file)
+    except BaseException:
+        if os.path.exists(temp_file):
+            os.remove(temp_file)
+        raise
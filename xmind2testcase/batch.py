@@ -0,0 +1,178 @@
+#!/usr/bin/env python
+# _*_ coding:utf-8 _*_
+import glob
+import json
+import logging
+import os
+import time
+from collections import OrderedDict, namedtuple
+
+from xmind2testcase.__about__ import __version__
+from xmind2testcase.artifact import get_content_hash, options_to_dict
+from xmind2testcase.pipeline import DEFAULT_SINKS, check_sinks, convert
+
+"""
+Convert all the XMind files of a directory or a glob pattern on a process pool
+
+    result = convert_batch('path/to/testcases', sinks=['xml', 'csv'], jobs=4)
+    print(format_batch_summary(result))
+
+A manifest records the content hash, the options and the outputs of every converted file,
+so the files unchanged since the last run are skipped without starting a worker for them.
+"""
+
+MANIFEST_FILE = '.xmind2testcase.manifest.json'
+
+# uncounted: the converted files whose outputs were all up to date, so they weren't parsed and counted
+BatchResult = namedtuple('BatchResult', ['converted', 'skipped', 'failed', 'testcase_count', 'total_time',
+                                         'uncounted'])
+
+
+def discover_xmind_files(path):
+    """Return the sorted absolute paths of the XMind files of a file, a directory (recursively) or a glob pattern"""
+    if os.path.isfile(path):
+        xmind_files = [path]
+    elif os.path.isdir(path):
+        xmind_files = [os.path.join(root, name) for root, _, names in os.walk(path)
+                       for name in names if name.endswith('.xmind')]
+    else:
+        xmind_files = [f for f in glob.glob(path, recursive=True) if f.endswith('.xmind') and os.path.isfile(f)]
+    return sorted(os.path.abspath(f) for f in xmind_files)
+
+
+def get_manifest_file(path):
+    """The default manifest file: in the directory, or in the current directory for a file or a glob pattern"""
+    return os.path.join(path if os.path.isdir(path) else os.getcwd(), MANIFEST_FILE)
+
+
+def read_manifest(manifest_file):
+    try:
+        with open(manifest_file, encoding='utf8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return manifest if isinstance(manifest, dict) else {}
+
+
+def write_manifest(manifest_file, manifest):
+    """Write the manifest atomically, so an interrupted run leaves the former one"""
+    temp_file = '%s.%d.tmp' % (manifest_file, os.getpid())
+    with open(temp_file, 'w', encoding='utf8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=4, sort_keys=True)
+    os.replace(temp_file, manifest_file)
+
+
+def gen_manifest_entry(xmind_file, sinks, options=None):
+    """The manifest data of a file, without its outputs"""
+    return {
+        'version': __version__,
+        'source': get_content_hash(xmind_file),
+        'options': options_to_dict(options),
+        'sinks': sorted(sinks),
+    }
+
+
+def is_entry_fresh(entry, expected):
+    """Whether the recorded entry matches the expected one and its outputs still exist"""
+    if not entry or any(entry.get(key) != value for key, value in expected.items()):
+        return False
+    return all(os.path.exists(output_file) for output_file in entry.get('outputs', {}).values())
+
+
+def _convert_file(task):
+    """Convert one file in a worker process, return the outputs and the number of testcases"""
+    xmind_file, sinks, options = task
+    result = convert(xmind_file, sinks=sinks, options=options, max_workers=1)
+    return dict(result.outputs), result.testcase_count
+
+
+def convert_batch(path, sinks=DEFAULT_SINKS, options=None, jobs=None, manifest_file=None):
+    """Convert all the XMind files found at the path, skipping the files unchanged since the last run
+
+    :param path: a XMind file, a directory or a glob pattern like 'maps/**/*.xmind'
+    :param sinks: the sink names, see `xmind2testcase.pipeline.SINKS`
+    :param options: the `xmind2testcase.parser.ParseOptions`
+    :param jobs: the number of worker processes, the number of CPUs by default, 1 converts in this process
+    :param manifest_file: the manifest file, see `get_manifest_file` for the default one
+    :return: a `BatchResult`: the lists of converted, skipped and failed files, the number of testcases
+             of the converted files, the total time, and the list of converted files of unknown testcases
+    """
+    check_sinks(sinks)
+
+    start = time.perf_counter()
+    manifest_file = manifest_file or get_manifest_file(path)
+    manifest = read_manifest(manifest_file)
+    sinks = list(sinks)
+
+    expected_entries = OrderedDict()
+    skipped = []
+    for xmind_file in discover_xmind_files(path):
+        expected = gen_manifest_entry(xmind_file, sinks, options)
+        if is_entry_fresh(manifest.get(xmind_file), expected):
+            skipped.append(xmind_file)
+        else:
+            expected_entries[xmind_file] = expected
+    logging.info('Found %d XMind files at %s, %d unchanged since the last run',
+                 len(expected_entries) + len(skipped), path, len(skipped))
+
+    converted, failed, uncounted = [], [], []
+    testcase_count = 0
+    tasks = [(xmind_file, sinks, options) for xmind_file in expected_entries]
+    for xmind_file, outputs, count, error in _run_tasks(tasks, jobs):
+        if error is not None:
+            logging.error('Failed to convert XMind file(%s): %s', xmind_file, error)
+            manifest.pop(xmind_file, None)
+            failed.append(xmind_file)
+            continue
+        expected = expected_entries[xmind_file]
+        if count is None:
+            # nothing was parsed, the count of the former run still holds for the same content
+            entry = manifest.get(xmind_file) or {}
+            count = entry.get('testcases') if entry.get('source') == expected['source'] else None
+        converted.append(xmind_file)
+        if count is None:
+            uncounted.append(xmind_file)
+            manifest[xmind_file] = dict(expected, outputs=outputs)
+        else:
+            testcase_count += count
+            manifest[xmind_file] = dict(expected, outputs=outputs, testcases=count)
+
+    if converted or failed:
+        write_manifest(manifest_file, manifest)
+    return BatchResult(converted, skipped, failed, testcase_count, time.perf_counter() - start, uncounted)
+
+
+def _run_tasks(tasks, jobs):
+    """Yield (xmind_file, outputs, testcase_count, error) of every task as it completes"""
+    jobs = min(jobs or os.cpu_count() or 1, len(tasks))
+    if jobs <= 1:
+        for task in tasks:
+            try:
+                yield (task[0],) + _convert_file(task) + (None,)
+            except Exception as e:
+                yield task[0], None, None, e
+        return
+
+    # multiprocessing is only loaded for a parallel conversion
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = {executor.submit(_convert_file, task): task[0] for task in tasks}
+        for future in as_completed(futures):
+            try:
+                yield (futures[future],) + future.result() + (None,)
+            except Exception as e:
+                yield futures[future], None, None, e
+
+
+def format_batch_summary(result):
+    """The throughput summary of a batch conversion, the cases/s is unknown if some testcases weren't counted"""
+    elapsed = max(result.total_time, 1e-9)
+    if result.uncounted:
+        testcases = '%d testcases, %d files uncounted' % (result.testcase_count, len(result.uncounted))
+        cases_rate = 'unknown cases/s'
+    else:
+        testcases = '%d testcases' % result.testcase_count
+        cases_rate = '%.2f cases/s' % (result.testcase_count / elapsed)
+    return 'converted %d files (%s), skipped %d unchanged, failed %d in %.2f s: %.2f files/s, %s' % (
+        len(result.converted), testcases, len(result.skipped), len(result.failed), result.total_time,
+        len(result.converted) / elapsed, cases_rate)
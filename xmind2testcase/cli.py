@@ -1,11 +1,16 @@
 #!/usr/bin/env python
 # _*_ coding:utf-8 _*_
+import argparse
 import logging
 import sys
-from xmind2testcase.zentao import xmind_to_zentao_csv_file
+from xmind2testcase.artifact import regenerate_artifacts
+from xmind2testcase.zentao import xmind_to_zentao_csv_file, xmind_to_metersphere_xlsx_file
 from xmind2testcase.testlink import xmind_to_testlink_xml_file
-from xmind2testcase.utils import get_absolute_path, xmind_testcase_to_json_file
-from webtool.application import launch
+from xmind2testcase.instrument import StageProfiler
+from xmind2testcase.batch import convert_batch, format_batch_summary
+from xmind2testcase.pipeline import DEFAULT_SINKS, convert, format_timings
+from xmind2testcase.utils import get_absolute_path, xmind_testcase_to_json_file, xmind_testcase_to_jsonl_file
+from xmind2testcase.watch import POLL_INTERVAL, DEBOUNCE_DELAY, XMindWatcher
 
 logging.basicConfig(level=logging.INFO,
                     format='%(asctime)s  %(name)s  %(levelname)s  [%(module)s - %(funcName)s]: %(message)s',
@@ -16,7 +21,10 @@ using_doc = """
     xml file or a zentao recognized cvs file, then you can import it into testlink or zentao.
     
     Usage:
-     xmind2testcase [path_to_xmind_file] [-csv] [-xml] [-json]
+     xmind2testcase [path_to_xmind_file] [-csv] [-xml] [-json] [-jsonl [-gzip]] [-xlsx] [--profile]
+                    [--profile-output path_to_pstats]
+     xmind2testcase convert [dir_or_glob] [--jobs N] [--formats json,xml,csv] [--manifest path_to_manifest]
+     xmind2testcase watch [path_or_glob] [--formats json,xml,csv] [--interval seconds] [--debounce seconds]
      xmind2testcase [webtool] [port_num]
     
     Example:
@@ -24,41 +32,101 @@ using_doc = """
      xmind2testcase /path/to/testcase.xmind -csv   => output testcase.csv
      xmind2testcase /path/to/testcase.xmind -xml   => output testcase.xml
      xmind2testcase /path/to/testcase.xmind -json  => output testcase.json
+     xmind2testcase /path/to/testcase.xmind -jsonl => output testcase.jsonl, one testcase per line
+     xmind2testcase /path/to/testcase.xmind -jsonl -gzip => output testcase.jsonl.gz
+     xmind2testcase /path/to/testcase.xmind -xlsx  => output testcase.xlsx for metersphere
+     xmind2testcase /path/to/testcase.xmind -csv --profile => output testcase.csv and print the wall time、CPU time、
+                                                      memory peak and objects of every conversion stage
+     xmind2testcase /path/to/testcase.xmind --profile-output convert.prof => also dump the cProfile stats
+     xmind2testcase convert /path/to/dir --jobs 4  => convert all the xmind files of the directory on 4 processes,
+                                                      skipping the files unchanged since the last run
+     xmind2testcase convert 'maps/**/*.xmind' --formats csv,xml => convert the matched xmind files to csv and xml
+     xmind2testcase watch /path/to/dir --formats csv,xml => convert every saved xmind file of the directory again
      xmind2testcase webtool                        => launch the web testcase conversion tool locally: 127.0.0.1:5001
      xmind2testcase webtool 8000                   => launch the web testcase conversion tool locally: 127.0.0.1:8000
     """
 
 
 def cli_main():
-    if len(sys.argv) > 1 and sys.argv[1].endswith('.xmind'):
-        xmind_file = sys.argv[1]
+    argv, profile, profile_output = pop_profile_args(sys.argv)
+    if not profile:
+        run_command(argv)
+        return
+
+    # the sinks run one by one in this thread, so the stage peaks and the cProfile stats cover all of them,
+    # and the up to date outputs are written again, otherwise there would be nothing to profile
+    with StageProfiler(cprofile_file=profile_output) as profiler, regenerate_artifacts():
+        run_command(argv, max_workers=1)
+    if not profiler.stats:
+        logging.info('Nothing was converted in this process, e.g. every file was unchanged since the last batch, '
+                     'so no stage was profiled')
+    logging.info('Profile of the conversion stages:\n%s', profiler.report())
+    if profile_output:
+        logging.info('Dump the cProfile stats to %s, read them by: python -m pstats %s', profile_output, profile_output)
+
+
+def pop_profile_args(argv):
+    """Remove the profiling options from the arguments, return (arguments, profile, profile output file)"""
+    args, profile, profile_output = [], False, None
+    index = 0
+    while index < len(argv):
+        arg = argv[index]
+        if arg == '--profile':
+            profile = True
+        elif arg == '--profile-output' and index + 1 < len(argv):
+            profile, profile_output = True, argv[index + 1]
+            index += 1
+        elif arg.startswith('--profile-output='):
+            profile, profile_output = True, arg.split('=', 1)[1]
+        else:
+            args.append(arg)
+        index += 1
+    return args, profile, profile_output
+
+
+def run_command(argv, max_workers=None):
+    if len(argv) > 1 and argv[1].endswith('.xmind'):
+        xmind_file = argv[1]
         xmind_file = get_absolute_path(xmind_file)
         logging.info('Start to convert XMind file: %s', xmind_file)
 
-        if len(sys.argv) == 3 and sys.argv[2] == '-json':
+        if len(argv) == 3 and argv[2] == '-json':
             testlink_json_file = xmind_testcase_to_json_file(xmind_file)
             logging.info('Convert XMind file to testcase json file successfully: %s', testlink_json_file)
-        elif len(sys.argv) == 3 and sys.argv[2] == '-xml':
+        elif len(argv) in (3, 4) and argv[2] == '-jsonl':
+            compress = len(argv) == 4 and argv[3] == '-gzip'
+            testcase_jsonl_file = xmind_testcase_to_jsonl_file(xmind_file, compress=compress)
+            logging.info('Convert XMind file to testcase jsonl file successfully: %s', testcase_jsonl_file)
+        elif len(argv) == 3 and argv[2] == '-xml':
             testlink_xml_file = xmind_to_testlink_xml_file(xmind_file)
             logging.info('Convert XMind file to testlink xml files successfully: %s', testlink_xml_file)
-        elif len(sys.argv) == 3 and sys.argv[2] == '-csv':
+        elif len(argv) == 3 and argv[2] == '-csv':
             zentao_csv_file = xmind_to_zentao_csv_file(xmind_file)
             logging.info('Convert XMind file to zentao csv file successfully: %s', zentao_csv_file)
+        elif len(argv) == 3 and argv[2] == '-xlsx':
+            metersphere_xlsx_file = xmind_to_metersphere_xlsx_file(xmind_file)
+            logging.info('Convert XMind file to metersphere xlsx file successfully: %s', metersphere_xlsx_file)
         else:
-            testlink_json_file = xmind_testcase_to_json_file(xmind_file)
-            testlink_xml_file = xmind_to_testlink_xml_file(xmind_file)
-            zentao_csv_file = xmind_to_zentao_csv_file(xmind_file)
+            result = convert(xmind_file, sinks=['json', 'xml', 'csv'], max_workers=max_workers)
             logging.info('Convert XMind file successfully: \n'
                          '1、 testcase json file(%s)\n'
                          '2、 testlink xml file(%s)\n'
-                         '3、 zentao csv file(%s)',
-                         testlink_json_file,
-                         testlink_xml_file,
-                         zentao_csv_file)
-    elif len(sys.argv) > 1 and sys.argv[1] == 'webtool':
-        if len(sys.argv) == 3:
+                         '3、 zentao csv file(%s)\n'
+                         '%s',
+                         result.outputs['json'],
+                         result.outputs['xml'],
+                         result.outputs['csv'],
+                         format_timings(result))
+    elif len(argv) > 1 and argv[1] == 'convert':
+        batch_main(argv[2:])
+    elif len(argv) > 1 and argv[1] == 'watch':
+        watch_main(argv[2:])
+    elif len(argv) > 1 and argv[1] == 'webtool':
+        # flask and the webtool's log handlers are only loaded for the webtool
+        from webtool.application import launch
+        if len(argv) == 3:
             try:
-                port = int(sys.argv[2])
+                port = int(argv[2])
                 launch(port=port)
             except ValueError:
                 launch()
@@ -69,5 +137,42 @@ def cli_main():
         print(using_doc)
 
 
+def batch_main(argv):
+    arg_parser = argparse.ArgumentParser(prog='xmind2testcase convert',
+                                         description='Convert all the xmind files of a directory or a glob pattern')
+    arg_parser.add_argument('path', help='a directory, or a glob pattern like "maps/**/*.xmind"')
+    arg_parser.add_argument('--jobs', type=int, default=None, help='the number of processes, the CPU count by default')
+    arg_parser.add_argument('--formats', default=','.join(DEFAULT_SINKS), help='the comma separated output formats')
+    arg_parser.add_argument('--manifest', default=None, help='the manifest of the converted files')
+    args = arg_parser.parse_args(argv)
+
+    sinks = [sink.strip() for sink in args.formats.split(',') if sink.strip()]
+    try:
+        result = convert_batch(args.path, sinks=sinks, jobs=args.jobs, manifest_file=args.manifest)
+    except ValueError as e:
+        arg_parser.error(str(e))
+    logging.info('Convert XMind files successfully: %s', format_batch_summary(result))
+    if result.failed:
+        sys.exit(1)
+
+
+def watch_main(argv):
+    arg_parser = argparse.ArgumentParser(prog='xmind2testcase watch',
+                                         description='Convert the xmind files again whenever they are saved')
+    arg_parser.add_argument('path', help='a xmind file, a directory, or a glob pattern like "maps/**/*.xmind"')
+    arg_parser.add_argument('--formats', default=','.join(DEFAULT_SINKS), help='the comma separated output formats')
+    arg_parser.add_argument('--interval', type=float, default=POLL_INTERVAL, help='the polling interval in seconds')
+    arg_parser.add_argument('--debounce', type=float, default=DEBOUNCE_DELAY,
+                            help='the seconds a file must stay unchanged before it is converted')
+    args = arg_parser.parse_args(argv)
+
+    sinks = [sink.strip() for sink in args.formats.split(',') if sink.strip()]
+    try:
+        watcher = XMindWatcher(args.path, sinks=sinks, interval=args.interval, debounce=args.debounce)
+    except ValueError as e:
+        arg_parser.error(str(e))
+    watcher.run()
+
+
 if __name__ == '__main__':
     cli_main()
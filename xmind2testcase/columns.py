@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+# _*_ coding:utf-8 _*_
+import csv
+from operator import itemgetter
+
+from xmind2testcase.serializer import write_chunks
+
+"""
+Build the rows of a tabular testcase file (zentao csv, metersphere xlsx...) from column specs
+
+A layout is a list of headers, and the column specs map each header to an extractor: a function of the testcase data
+that returns the cell value. The headers are compiled into a tuple of extractors once per file,
+then every row is just those calls, so rows can be streamed as the testcases are parsed.
+"""
+
+UNDEFINED_COLUMN = '未定义此列头内容'
+
+
+def constant(value):
+    """An extractor giving the same value for every testcase"""
+    return lambda testcase_dict: value
+
+
+def field(name):
+    """An extractor giving a field of the testcase data"""
+    return itemgetter(name)
+
+
+def compile_columns(headers, column_specs, default=UNDEFINED_COLUMN):
+    """Compile the headers into a tuple of extractors, an unknown header gets the default value"""
+    return tuple(column_specs.get(header) or constant(default) for header in headers)
+
+
+def iter_rows(testcases, columns):
+    """Yield the row of every testcase data, with the compiled columns"""
+    for testcase_dict in testcases:
+        yield [extract(testcase_dict) for extract in columns]
+
+
+def write_csv_rows(f, headers, testcases, column_specs):
+    """Write the header and the testcase rows to a csv file object, the rows are encoded in the serialize stage
+
+    :return: the number of testcase rows
+    """
+    # writerow returns what the write method of its file returns: the csv line here
+    writer = csv.writer(_LineEcho())
+    f.write(writer.writerow(headers))
+    lines = (writer.writerow(row) for row in iter_rows(testcases, compile_columns(headers, column_specs)))
+    return write_chunks(lines, f)
+
+
+class _LineEcho(object):
+    def write(self, line):
+        return line
@@ -0,0 +1,134 @@
+#!/usr/bin/env python
+# _*_ coding:utf-8 _*_
+import itertools
+import logging
+
+"""
+Expand the parameters of a parameterized testcase into combinations
+
+A testcase topic whose comment is a JSON object like {"id": ["1111", "2222"], "name": ["july", "stone"]}
+is expanded into one testcase per combination of the parameter values, either:
+- product: all combinations (the cartesian product), or
+- pairwise: a covering array in which every pair of values of any two parameters appears at least once,
+  e.g. 5 parameters x 6 values need a few dozen combinations instead of 7776.
+"""
+
+MODE_PRODUCT = 'product'
+MODE_PAIRWISE = 'pairwise'
+DEFAULT_LIMIT = 1000
+
+
+def iter_combinations(parm, mode=MODE_PRODUCT, limit=DEFAULT_LIMIT):
+    """Yield the combinations of the parameters as {name: value} dicts lazily, at most `limit` of them
+
+    :param parm: the parameters {name: [value, ...]}
+    :param mode: MODE_PRODUCT or MODE_PAIRWISE
+    :param limit: the maximum number of combinations, None or 0 means unlimited
+    """
+    names = list(parm.keys())
+    values_list = [parm[name] for name in names]
+
+    if mode == MODE_PAIRWISE:
+        # the size of a covering array isn't known until it's built, so look one row past the limit
+        combinations = iter_pairwise(values_list)
+        if limit:
+            combinations = _warn_truncated(combinations, names, limit)
+    else:
+        if mode != MODE_PRODUCT:
+            logging.warning('Unknown parameter combination mode: %s, use %s instead', mode, MODE_PRODUCT)
+        combinations = itertools.product(*values_list)
+        total = count_product(values_list)
+        if limit and total > limit:
+            logging.warning('The parameters %s have %s combinations, only the first %s are used', names, total, limit)
+        if limit:
+            combinations = itertools.islice(combinations, limit)
+
+    for combination in combinations:
+        yield dict(zip(names, combination))
+
+
+def _warn_truncated(combinations, names, limit):
+    """Yield the first `limit` combinations, warn if there are more"""
+    for index, combination in enumerate(combinations):
+        if index == limit:
+            logging.warning('The parameters %s have more than %s pairwise combinations, only the first %s are used',
+                            names, limit, limit)
+            return
+        yield combination
+
+
+def count_product(values_list):
+    total = 1
+    for values in values_list:
+        total *= len(values)
+    return total
+
+
+def iter_pairwise(values_list):
+    """Yield an all-pairs covering array of the values, built by the IPOG strategy
+
+    The parameters are added one by one: each existing row is extended with the value that covers the most
+    uncovered pairs (horizontal growth), then new rows are added for the pairs still uncovered (vertical growth).
+    """
+    if len(values_list) < 2 or any(not values for values in values_list):
+        yield from itertools.product(*values_list)
+        return
+
+    # the parameters with more values go first, which makes a smaller array
+    order = sorted(range(len(values_list)), key=lambda index: -len(values_list[index]))
+    sizes = [len(values_list[index]) for index in order]
+    rows = [[first, second] for first in range(sizes[0]) for second in range(sizes[1])]
+
+    for k in range(2, len(sizes)):
+        uncovered = {(j, value_j, value_k)
+                     for j in range(k) for value_j in range(sizes[j]) for value_k in range(sizes[k])}
+
+        for row in rows:
+            best_value, best_covered = 0, -1
+            for value_k in range(sizes[k]):
+                covered = sum(1 for j in range(k) if row[j] is not None and (j, row[j], value_k) in uncovered)
+                if covered > best_covered:
+                    best_value, best_covered = value_k, covered
+            row.append(best_value)
+            for j in range(k):
+                uncovered.discard((j, row[j], best_value))
+
+        new_rows = []
+        for j, value_j, value_k in sorted(uncovered):
+            for row in new_rows:
+                if row[k] == value_k and row[j] is None:
+                    row[j] = value_j
+                    break
+            else:
+                row = [None] * (k + 1)
+                row[j], row[k] = value_j, value_k
+                new_rows.append(row)
+        rows.extend(new_rows)
+
+    seen = set()
+    for row in rows:
+        indexes = tuple(0 if value is None else value for value in row)  # any value fits a don't-care cell
+        if indexes in seen:
+            continue
+        seen.add(indexes)
+
+        combination = [None] * len(order)
+        for position, index in enumerate(order):
+            combination[index] = values_list[index][indexes[position]]
+        yield tuple(combination)
+
+
+class _ParmFormatDict(dict):
+    def __missing__(self, key):
+        return '{' + key + '}'
+
+
+def format_with_parm(text, parm_map):
+    """Fill the {name} placeholders of a text with the parameter values, unknown placeholders are kept"""
+    if not isinstance(text, str) or '{' not in text:
+        return text
+    try:
+        return text.format_map(_ParmFormatDict(parm_map))
+    except (ValueError, IndexError, AttributeError, TypeError):
+        logging.warning('Unable to fill the parameters %s into: %s', parm_map, text)
+        return text
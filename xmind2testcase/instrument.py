@@ -0,0 +1,328 @@
+#!/usr/bin/env python
+# _*_ coding:utf-8 _*_
+import logging
+import threading
+import time
+
+"""
+Instrument the conversion stages: load、filter、parse、serialize、write
+
+A hook is a callable `hook(stage, elapsed, count)`, it's called when a stage ends with the elapsed seconds
+and the number of objects handled in it, and its `enter(stage)` method, if any, is called when a stage starts.
+While no hook is registered, `stage()` returns a shared no-op context manager,
+so an uninstrumented run only pays a tuple truth test per stage.
+
+Usage:
+    with StageTimer() as timer:
+        xmind_to_testlink_xml_file(xmind_file)
+    print(timer.report())
+"""
+
+STAGE_LOAD = 'load'
+STAGE_FILTER = 'filter'
+STAGE_PARSE = 'parse'
+STAGE_SERIALIZE = 'serialize'
+STAGE_WRITE = 'write'
+STAGES = (STAGE_LOAD, STAGE_FILTER, STAGE_PARSE, STAGE_SERIALIZE, STAGE_WRITE)
+
+_hooks = ()  # replaced as a whole on change, so the stages iterate it without a lock
+_hooks_lock = threading.Lock()
+
+
+def add_hook(hook):
+    """Register a `hook(stage, elapsed, count)` callable"""
+    global _hooks
+    with _hooks_lock:
+        if hook not in _hooks:
+            _hooks = _hooks + (hook,)
+    return hook
+
+
+def remove_hook(hook):
+    global _hooks
+    with _hooks_lock:
+        _hooks = tuple(registered for registered in _hooks if registered != hook)
+
+
+def has_hooks():
+    return bool(_hooks)
+
+
+def stage(name, count=0):
+    """Measure a stage as a context manager, add the handled objects by `add()` of the returned object"""
+    if not _hooks:
+        return _NULL_STAGE
+    return _Stage(name, count)
+
+
+class _NullStage(object):
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def add(self, count=1):
+        pass
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage(object):
+    __slots__ = ('name', 'count', 'start')
+
+    def __init__(self, name, count=0):
+        self.name = name
+        self.count = count
+        self.start = None
+
+    def __enter__(self):
+        for hook in _hooks:
+            enter = getattr(hook, 'enter', None)
+            if enter is not None:
+                try:
+                    enter(self.name)
+                except Exception:
+                    logging.exception('The instrument hook %r failed on stage: %s', hook, self.name)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        elapsed = time.perf_counter() - self.start
+        for hook in _hooks:
+            try:
+                hook(self.name, elapsed, self.count)
+            except Exception:
+                logging.exception('The instrument hook %r failed on stage: %s', hook, self.name)
+        return False
+
+    def add(self, count=1):
+        self.count += count
+
+
+class StageTimer(object):
+    """A hook collecting the total time, calls and objects of every stage, thread safe
+
+    It registers itself while used as a context manager, or add it by `add_hook()`.
+    """
+
+    def __init__(self):
+        self.stats = {}  # {stage: [total seconds, calls, objects]}
+        self._lock = threading.Lock()
+
+    def __call__(self, name, elapsed, count):
+        with self._lock:
+            stat = self.stats.setdefault(name, [0.0, 0, 0])
+            stat[0] += elapsed
+            stat[1] += 1
+            stat[2] += count
+
+    def __enter__(self):
+        add_hook(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        remove_hook(self)
+        return False
+
+    def as_dict(self):
+        with self._lock:
+            return {name: {'time': stat[0], 'calls': stat[1], 'objects': stat[2]} for name, stat in self.stats.items()}
+
+    def report(self):
+        lines = ['%-10s %10s %8s %10s' % ('stage', 'time(ms)', 'calls', 'objects')]
+        for name, stat in sorted(self.as_dict().items(), key=lambda item: _stage_order(item[0])):
+            lines.append('%-10s %10.2f %8d %10d' % (name, stat['time'] * 1000, stat['calls'], stat['objects']))
+        return '\n'.join(lines)
+
+
+class StageProfiler(StageTimer):
+    """A `StageTimer` also measuring the CPU time and the tracemalloc peak of every stage and of the whole run
+
+    The stages nest (the write stage pulls the parsed testcases through the parse and serialize stages),
+    so the wall time, the CPU time and the peak of a stage are exclusive: its nested stages are left out,
+    and the `other` row is the rest of the total of the whole run, the time spent out of any stage.
+    The CPU time of a stage is the time of the thread running it, the total one is the process time,
+    so the `other` CPU time also holds the CPU time of the threads out of any stage. The peak is the highest
+    traced memory above the memory where the stage's own code started or resumed after a nested stage,
+    so the memory kept by the nested stages isn't counted again, and tracemalloc is started if it isn't tracing yet.
+    tracemalloc slows the run down, so the times are only comparable between profiled runs,
+    and its peak is process wide, so the stages running on several threads at once share their peaks.
+
+    :param cprofile_file: dump the cProfile stats of the calling thread to this file, to read with `pstats`
+    """
+
+    def __init__(self, trace_memory=True, cprofile_file=None):
+        super(StageProfiler, self).__init__()
+        self.trace_memory = trace_memory
+        self.cprofile_file = cprofile_file
+        self.details = {}  # {stage: [total CPU seconds, peak bytes]}
+        self.total = None  # {'time':, 'cpu':, 'peak':} of the whole run
+        self._local = threading.local()
+        self._started_tracing = False
+        self._cprofile = None
+        self._start = None
+        self._highest_peak = None  # the highest traced memory of the run
+
+    def enter(self, name):
+        self._stack().append(self._begin(name))
+
+    def __call__(self, name, elapsed, count):
+        stack = self._stack()
+        if not stack or stack[-1][0] != name:  # the profiler was added while the stage was running
+            super(StageProfiler, self).__call__(name, elapsed, count)
+            return
+        entry = stack.pop()
+        cpu, peak = self._end(entry)
+        if stack:
+            stack[-1][4] += elapsed
+            stack[-1][5] += cpu
+        super(StageProfiler, self).__call__(name, elapsed - entry[4], count)
+        with self._lock:
+            detail = self.details.setdefault(name, [0.0, None])
+            detail[0] += cpu - entry[5]
+            if peak is not None:
+                detail[1] = peak if detail[1] is None else max(detail[1], peak)
+
+    def __enter__(self):
+        if self.trace_memory:
+            # tracemalloc and cProfile are only loaded for a profiled run
+            import tracemalloc
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracing = True
+        if self.cprofile_file:
+            import cProfile
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+        self._highest_peak = None
+        entry = self._begin(None)
+        self._start = (time.perf_counter(), time.process_time(), entry[2])
+        self._stack().append(entry)
+        return super(StageProfiler, self).__enter__()
+
+    def __exit__(self, *exc_info):
+        super(StageProfiler, self).__exit__(*exc_info)
+        start, cpu_start, traced_start = self._start
+        elapsed, cpu = time.perf_counter() - start, time.process_time() - cpu_start
+        stack = self._stack()
+        peak = None
+        if stack and stack[-1][0] is None:
+            entry = stack.pop()
+            self._end(entry)
+            if traced_start is not None and self._highest_peak is not None:
+                peak = self._highest_peak - traced_start
+        self.total = {'time': elapsed, 'cpu': cpu, 'peak': peak}
+
+        if self._cprofile is not None:
+            self._cprofile.disable()
+            self._cprofile.dump_stats(self.cprofile_file)
+            self._cprofile = None
+        if self._started_tracing:
+            import tracemalloc
+            tracemalloc.stop()
+            self._started_tracing = False
+        return False
+
+    def _stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _begin(self, name):
+        """Return the [stage, CPU time, traced memory, own peak, nested wall time, nested CPU time] of a new stage,
+        the traced memory is where the own code of the stage started or resumed"""
+        current = None
+        if self.trace_memory:
+            import tracemalloc
+            if tracemalloc.is_tracing():
+                current, peak = tracemalloc.get_traced_memory()
+                self._observe_peak(peak)
+                stack = self._stack()
+                if stack and stack[-1][2] is not None:  # keep the own peak of the enclosing stage before the reset
+                    stack[-1][3] = max(stack[-1][3], peak - stack[-1][2])
+                tracemalloc.reset_peak()
+        return [name, time.thread_time(), current, 0, 0.0, 0.0]
+
+    def _end(self, entry):
+        """Return the CPU time, nested stages included, and the own peak (None if the memory isn't traced)
+        of a stage started by `_begin` and popped from the stack"""
+        cpu = time.thread_time() - entry[1]
+        if entry[2] is None:
+            return cpu, None
+
+        import tracemalloc
+        if not tracemalloc.is_tracing():
+            return cpu, entry[3]
+        current, peak = tracemalloc.get_traced_memory()
+        self._observe_peak(peak)
+        tracemalloc.reset_peak()
+        stack = self._stack()
+        if stack and stack[-1][2] is not None:  # the enclosing stage resumes from here
+            stack[-1][2] = current
+        return cpu, max(entry[3], peak - entry[2])
+
+    def _observe_peak(self, peak):
+        with self._lock:
+            if self._highest_peak is None or peak > self._highest_peak:
+                self._highest_peak = peak
+
+    @property
+    def other(self):
+        """{'time':, 'cpu':} of the run out of any stage: the total minus the stages, None before the run ends"""
+        if self.total is None:
+            return None
+        stats = self.as_dict().values()
+        return {'time': self.total['time'] - sum(stat['time'] for stat in stats),
+                'cpu': self.total['cpu'] - sum(stat['cpu'] or 0.0 for stat in stats)}
+
+    def as_dict(self):
+        stats = super(StageProfiler, self).as_dict()
+        with self._lock:
+            for name, stat in stats.items():
+                cpu, peak = self.details.get(name, (None, None))
+                stat.update(cpu=cpu, peak=peak)
+        return stats
+
+    def report(self):
+        lines = ['%-10s %10s %10s %12s %8s %10s' % ('stage', 'wall(ms)', 'cpu(ms)', 'peak(KiB)', 'calls', 'objects')]
+        for name, stat in sorted(self.as_dict().items(), key=lambda item: _stage_order(item[0])):
+            lines.append('%-10s %10.2f %10s %12s %8d %10d' % (
+                name, stat['time'] * 1000, _format_number(stat['cpu'], 1000), _format_number(stat['peak'], 1 / 1024),
+                stat['calls'], stat['objects']))
+        other = self.other
+        if other is not None:
+            lines.append('%-10s %10.2f %10.2f' % ('other', other['time'] * 1000, other['cpu'] * 1000))
+        if self.total is not None:
+            lines.append('%-10s %10.2f %10.2f %12s' % ('total', self.total['time'] * 1000, self.total['cpu'] * 1000,
+                                                       _format_number(self.total['peak'], 1 / 1024)))
+        return '\n'.join(lines)
+
+
+def _format_number(value, scale):
+    return '-' if value is None else '%.2f' % (value * scale)
+
+
+def _stage_order(name):
+    return STAGES.index(name) if name in STAGES else len(STAGES)
+
+
+class lazy_dict(object):
+    """Defer `obj.to_dict()` to the moment a log record is really formatted
+
+    logging.warning('This testcase result is abnormal: %s', lazy_dict(testcase))
+    """
+
+    __slots__ = ('obj',)
+
+    def __init__(self, obj):
+        self.obj = obj
+
+    def __str__(self):
+        return str(self.obj.to_dict())
+
+    __repr__ = __str__
@@ -0,0 +1,248 @@
+#!/usr/bin/env python
+# _*_ coding:utf-8 _*_
+import json
+import logging
+import zipfile
+from xml.etree.ElementTree import iterparse, ParseError
+
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:  # orjson is an optional speedup
+    json_loads = json.loads
+
+"""
+Load a XMind file straight from its zip archive
+
+Only the fields the parser reads are extracted: title、note、comment、label、markers and the attached topics,
+the result has the same shape as `xmind.load(xmind_file).getData()`.
+
+XMind Zen/2020+ files are read from content.json, their content.xml is only a placeholder for old clients.
+The other members (images, attachments, thumbnails, revisions...) are never decompressed: opening the archive
+only reads its central directory, and each member is inflated while it's read.
+"""
+
+CONTENT_JSON = 'content.json'
+CONTENT_XML = 'content.xml'
+COMMENTS_XML = 'comments.xml'
+
+TAG_SHEET = 'sheet'
+TAG_TOPIC = 'topic'
+TAG_TOPICS = 'topics'
+TAG_TITLE = 'title'
+TAG_NOTES = 'notes'
+TAG_PLAIN = 'plain'
+TAG_LABELS = 'labels'
+TAG_LABEL = 'label'
+TAG_MARKER_REFS = 'marker-refs'
+TAG_MARKER_REF = 'marker-ref'
+TAG_COMMENT = 'comment'
+TAG_CONTENT = 'content'
+
+ATTR_ID = 'id'
+ATTR_TYPE = 'type'
+ATTR_MARKER_ID = 'marker-id'
+ATTR_OBJECT_ID = 'object-id'
+
+TOPICS_ATTACHED = 'attached'
+
+
+def get_workbook_members(names):
+    """Return the members `load_workbook` reads out of the archive's member names, the content one first"""
+    names = set(names)
+    members = [CONTENT_JSON] if CONTENT_JSON in names else [CONTENT_XML] if CONTENT_XML in names else []
+    if members and COMMENTS_XML in names:
+        members.append(COMMENTS_XML)
+    return members
+
+
+def load_workbook(xmind_file):
+    """Load a XMind file to a list of sheet dict data, return an empty list if it can't be read"""
+    try:
+        with zipfile.ZipFile(xmind_file) as zf:
+            members = get_workbook_members(zf.namelist())
+            if not members:
+                logging.error('Invalid XMind file(%s): %s not found!', xmind_file, CONTENT_XML)
+                return []
+
+            comments = {}
+            if COMMENTS_XML in members:
+                with zf.open(COMMENTS_XML) as f:
+                    comments = parse_comments_xml(f)
+
+            if members[0] == CONTENT_JSON:
+                return parse_content_json(zf.read(CONTENT_JSON), comments)
+
+            with zf.open(CONTENT_XML) as f:
+                return parse_content_xml(f, comments)
+    except (OSError, ValueError, ParseError, zipfile.BadZipFile) as e:
+        logging.error('Invalid XMind file(%s): %s', xmind_file, e)
+        return []
+
+
+def parse_comments_xml(source):
+    """Parse comments.xml to a {topic id: comment content} index, comments of one topic are joined by line"""
+    comments = {}
+
+    for _, elem in iterparse(source, events=('end',)):
+        tag = _local_name(elem.tag)
+
+        if tag == TAG_COMMENT:
+            object_id = elem.get(ATTR_OBJECT_ID)
+            content_elem = _find_child(elem, TAG_CONTENT)
+            content = get_text_content(content_elem) if content_elem is not None else None
+
+            if comments.get(object_id) is not None and content is not None:
+                comments[object_id] = comments[object_id] + '\n' + content
+            elif content is not None or object_id not in comments:
+                comments[object_id] = content
+            elem.clear()
+
+    return comments
+
+
+def parse_content_xml(source, comments=None):
+    """Stream content.xml and build the sheet dict data, every topic element is cleared once it is read"""
+    comments = comments or {}
+    sheets = []
+    sheet = None
+    elements = []  # the open elements' tag
+    topics = []  # the open attached topics' dict data
+    skipped_depth = None  # the depth of an open detached/summary topics element
+
+    for event, elem in iterparse(source, events=('start', 'end')):
+        tag = _local_name(elem.tag)
+
+        if event == 'start':
+            elements.append(tag)
+
+            if skipped_depth is not None:
+                continue
+
+            parent_tag = elements[-2] if len(elements) > 1 else None
+
+            if tag == TAG_SHEET:
+                sheet = {'id': elem.get(ATTR_ID), 'title': None, 'topic': None}
+            elif tag == TAG_TOPICS and elem.get(ATTR_TYPE) != TOPICS_ATTACHED:
+                skipped_depth = len(elements)
+            elif tag == TAG_TOPIC and parent_tag in (TAG_SHEET, TAG_TOPICS):
+                topic_id = elem.get(ATTR_ID)
+                topics.append({
+                    'id': topic_id,
+                    'title': None,
+                    'note': None,
+                    'label': None,
+                    'comment': comments.get(topic_id),
+                    'markers': [],
+                })
+            continue
+
+        elements.pop()
+
+        if skipped_depth is not None:
+            if len(elements) < skipped_depth:
+                skipped_depth = None
+            continue
+
+        parent_tag = elements[-1] if elements else None
+        grandparent_tag = elements[-2] if len(elements) > 1 else None
+
+        if tag == TAG_TOPIC and parent_tag in (TAG_SHEET, TAG_TOPICS):
+            topic = topics.pop()
+            if topics:
+                topics[-1].setdefault('topics', []).append(topic)
+            elif sheet is not None and sheet['topic'] is None:
+                sheet['topic'] = topic
+            elem.clear()
+        elif tag == TAG_SHEET:
+            if sheet is not None:
+                sheets.append(sheet)
+            sheet = None
+            elem.clear()
+        elif tag == TAG_TITLE:
+            if parent_tag == TAG_TOPIC and topics and topics[-1]['title'] is None:
+                topics[-1]['title'] = get_text_content(elem)
+            elif parent_tag == TAG_SHEET and sheet is not None and sheet['title'] is None:
+                sheet['title'] = get_text_content(elem)
+        elif tag == TAG_PLAIN and parent_tag == TAG_NOTES and grandparent_tag == TAG_TOPIC:
+            if topics[-1]['note'] is None:
+                topics[-1]['note'] = get_text_content(elem)
+        elif tag == TAG_LABEL and parent_tag == TAG_LABELS and grandparent_tag == TAG_TOPIC:
+            if topics[-1]['label'] is None:
+                topics[-1]['label'] = get_text_content(elem)
+        elif tag == TAG_MARKER_REF and parent_tag == TAG_MARKER_REFS and grandparent_tag == TAG_TOPIC:
+            topics[-1]['markers'].append(elem.get(ATTR_MARKER_ID))
+
+    return sheets
+
+
+def parse_content_json(content, comments=None):
+    """Map the sheets of a XMind Zen content.json to the sheet dict data"""
+    comments = comments or {}
+    sheets = []
+
+    for sheet_data in json_loads(content):
+        root_topic = sheet_data.get('rootTopic')
+        sheets.append({
+            'id': sheet_data.get('id'),
+            'title': sheet_data.get('title'),
+            'topic': json_topic_to_dict(root_topic, comments) if root_topic else None,
+        })
+
+    return sheets
+
+
+def json_topic_to_dict(root_topic, comments):
+    """Convert a content.json topic and its attached sub topics, iteratively to bear very deep maps"""
+    root = None
+    stack = [(root_topic, None)]
+
+    while stack:
+        topic_data, parent = stack.pop()
+        topic_id = topic_data.get('id')
+        notes = topic_data.get('notes') or {}
+        plain = notes.get('plain') or {}
+        labels = topic_data.get('labels') or []
+        topic = {
+            'id': topic_id,
+            'title': topic_data.get('title'),
+            'note': plain.get('content'),
+            'label': labels[0] if labels else None,
+            'comment': _json_topic_comment(topic_data, comments.get(topic_id)),
+            'markers': [marker.get('markerId') for marker in topic_data.get('markers') or []],
+        }
+
+        if parent is None:
+            root = topic
+        else:
+            parent['topics'].append(topic)
+
+        attached = (topic_data.get('children') or {}).get('attached') or []
+        if attached:
+            topic['topics'] = []
+            stack.extend((child, topic) for child in reversed(attached))
+
+    return root
+
+
+def _json_topic_comment(topic_data, default=None):
+    contents = [comment.get('content') for comment in topic_data.get('comments') or []
+                if isinstance(comment, dict) and comment.get('content') is not None]
+    return '\n'.join(contents) if contents else default
+
+
+def get_text_content(elem):
+    """Join the element's own text nodes by line like `xmind`, return None if it has no text"""
+    texts = [elem.text] if elem.text is not None else []
+    texts.extend(child.tail for child in elem if child.tail is not None)
+    return '\n'.join(texts) if texts else None
+
+
+def _local_name(tag):
+    return tag.rpartition('}')[2]
+
+
+def _find_child(elem, tag):
+    for child in elem:
+        if _local_name(child.tag) == tag:
+            return child
@@ -1,13 +1,75 @@
 #!/usr/bin/env python
 # _*_ coding:utf-8 _*_
+import sys
+from enum import IntEnum
 
 """
 testlink.testlink
+
+The models are slotted: a parsed workbook holds one TestCase per testcase and one TestStep per step,
+so they carry no instance `__dict__`. The result/importance/execution type fields are coerced to their
+IntEnum when assigned a valid value, other values (e.g. the labels list of a testcase's execution type)
+are kept as is, and `to_dict()` always gives plain ints.
 """
 
+# shared by every testcase/teststep without that content
+NO_CONTENT = sys.intern('无')
+NO_EXPECTED_RESULT = sys.intern('_')
+
+
+class TestResult(IntEnum):
+    NON_EXECUTION = 0
+    PASS = 1
+    FAILED = 2
+    BLOCKED = 3
+    SKIPPED = 4
+
+
+class Importance(IntEnum):
+    HIGH = 1
+    MIDDLE = 2
+    LOW = 3
+
+
+class ExecutionType(IntEnum):
+    MANUAL = 1
+    AUTOMATED = 2
+
+
+def coerce_enum(enum_cls, value):
+    """Return the member of the IntEnum if the value is a valid int of it, otherwise the value itself"""
+    if isinstance(value, int) and not isinstance(value, bool):
+        return enum_cls._value2member_map_.get(value, value)
+    return value
+
+
+def plain_value(value):
+    return int(value) if isinstance(value, IntEnum) else value
+
+
+class EnumField(object):
+    """A data descriptor storing the coerced value in the private slot `_<name>` of the owner"""
+
+    def __init__(self, enum_cls):
+        self.enum_cls = enum_cls
+        self.slot = None
+
+    def __set_name__(self, owner, name):
+        self.slot = owner.__dict__['_' + name]  # the slot's member descriptor
+
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return self
+        return self.slot.__get__(obj, owner)
+
+    def __set__(self, obj, value):
+        self.slot.__set__(obj, coerce_enum(self.enum_cls, value))
+
 
 class TestSuite(object):
 
+    __slots__ = ('name', 'details', 'testcase_list', 'sub_suites', 'statistics')
+
     def __init__(self, name='', details='', testcase_list=None, sub_suites=None, statistics=None):
         """
         TestSuite
@@ -47,6 +109,13 @@ class TestSuite(object):
 
 class TestCase(object):
 
+    __slots__ = ('name', 'version', 'summary', 'preconditions', '_execution_type', '_importance',
+                 'estimated_exec_duration', 'status', '_result', 'steps')
+
+    execution_type = EnumField(ExecutionType)
+    importance = EnumField(Importance)
+    result = EnumField(TestResult)
+
     def __init__(self, name='', version=1, summary='', preconditions='', execution_type=1, importance=2, estimated_exec_duration=3, status=7, result=0, steps=None):
         """
         TestCase
@@ -78,11 +147,11 @@ class TestCase(object):
             'version': self.version,  # TODO(devin): get version content
             'summary': self.summary,
             'preconditions': self.preconditions,
-            'execution_type': self.execution_type,
-            'importance': self.importance,
+            'execution_type': plain_value(self.execution_type),
+            'importance': plain_value(self.importance),
             'estimated_exec_duration': self.estimated_exec_duration,  # TODO(devin): get estimated content
             'status': self.status,  # TODO(devin): get status content
-            'result': self.result,
+            'result': plain_value(self.result),
             'steps': []
         }
 
@@ -95,6 +164,11 @@ class TestCase(object):
 
 class TestStep(object):
 
+    __slots__ = ('step_number', 'actions', 'expected_results', '_execution_type', '_result')
+
+    execution_type = EnumField(ExecutionType)
+    result = EnumField(TestResult)
+
     def __init__(self, step_number=1, actions='', expected_results='', execution_type=1, result=0):
         """
         TestStep
@@ -115,9 +189,8 @@ class TestStep(object):
             'step_number': self.step_number,
             'actions': self.actions,
             'expected_results': self.expected_results,
-            'execution_type': self.execution_type,
-            'result': self.result
+            'execution_type': plain_value(self.execution_type),
+            'result': plain_value(self.result)
         }
 
         return data
-
@@ -3,16 +3,21 @@
 import itertools
 import json
 import logging
+from collections import namedtuple
 
-from icecream import ic
-
-from xmind2testcase.metadata import TestSuite, TestCase, TestStep
+from xmind2testcase.combination import iter_combinations, format_with_parm, MODE_PRODUCT, DEFAULT_LIMIT
+from xmind2testcase.instrument import stage, has_hooks, STAGE_FILTER, STAGE_PARSE
+from xmind2testcase.metadata import TestSuite, TestCase, TestStep, NO_CONTENT, NO_EXPECTED_RESULT
 
+# kept for backward compatibility: it's compiled into a `ParseOptions` whenever no options are given,
+# and 'sep' is only the default, every sheet finds its own separator without writing it back here
 config = {'sep': ' ',
           'valid_sep': '&>+/-',
           'precondition_sep': '\n',
           'summary_sep': '\n----\n',
-          'ignore_char': '#!！'
+          'ignore_char': '#!！',
+          'parm_mode': MODE_PRODUCT,  # how to combine the parameters of a testcase: product or pairwise
+          'parm_limit': DEFAULT_LIMIT  # the maximum number of testcases expanded from one parameterized testcase
           }
 """
 tag：            xmind中的标签信息   label
@@ -24,10 +29,64 @@ summary:        xmind中的批注信息   comment
 """
 
 
+# test result markers, the smaller result takes precedence: non-execution:0, pass:1, failed:2, blocked:3, skipped:4
+RESULT_MARKERS = {
+    'symbol-right': 1, 'c_simbol-right': 1,
+    'symbol-wrong': 2, 'c_simbol-wrong': 2,
+    'symbol-pause': 3, 'c_simbol-pause': 3,
+    'symbol-minus': 4, 'c_simbol-minus': 4,
+}
+PRIORITY_MARKER_PREFIX = 'priority'
+
+
+class ParseOptions(namedtuple('ParseOptions', ['sep', 'valid_sep', 'precondition_sep', 'summary_sep', 'ignore_char',
+                                               'parm_mode', 'parm_limit'])):
+    """The compiled parsing options
+
+    It's immutable, so one instance can be shared by parsers running in a thread pool.
+    Each sheet is parsed with a copy carrying the sheet's own testcase title separator `sep`.
+    """
+
+    __slots__ = ()
+
+    def __new__(cls, sep=' ', valid_sep='&>+/-', precondition_sep='\n', summary_sep='\n----\n', ignore_char='#!！',
+                parm_mode=MODE_PRODUCT, parm_limit=DEFAULT_LIMIT):
+        return super(ParseOptions, cls).__new__(cls, sep, frozenset(valid_sep), precondition_sep, summary_sep,
+                                                frozenset(ignore_char), parm_mode, parm_limit)
+
+    @classmethod
+    def from_config(cls, conf=None):
+        """Compile the options from a dict like the module level `config`, which is the default"""
+        conf = config if conf is None else conf
+        return cls(sep=conf.get('sep', ' '),
+                   valid_sep=conf.get('valid_sep', '&>+/-'),
+                   precondition_sep=conf.get('precondition_sep', '\n'),
+                   summary_sep=conf.get('summary_sep', '\n----\n'),
+                   ignore_char=conf.get('ignore_char', '#!！'),
+                   parm_mode=conf.get('parm_mode', MODE_PRODUCT),
+                   parm_limit=conf.get('parm_limit', DEFAULT_LIMIT))
+
+    def is_ignored(self, value):
+        """Whether a string value is blank or starts with an ignore char"""
+        return value.strip() == '' or value[0] in self.ignore_char
+
+
+def get_parse_options(options=None):
+    """Return the given `ParseOptions`, or compile them from the current module level `config`"""
+    return options if options is not None else ParseOptions.from_config()
+
+
 # Todo 为什么summary没有获得父节点的summary
 
-def xmind_to_testsuites(xmind_content_dict):
-    """convert xmind file to `xmind2testcase.metadata.TestSuite` list"""
+def xmind_to_testsuites(xmind_content_dict, options=None, workers=None):
+    """convert xmind file to `xmind2testcase.metadata.TestSuite` list
+
+    :param workers: parse the testsuites on a pool of that many processes, the result is the same as the serial one
+    """
+    options = get_parse_options(options)
+    if workers and workers > 1:
+        return parallel_xmind_to_testsuites(xmind_content_dict, options, workers)
+
     suites = []
 
     for sheet in xmind_content_dict:
@@ -36,65 +95,166 @@ def xmind_to_testsuites(xmind_content_dict):
         sub_topics = root_topic.get('topics', [])
 
         if sub_topics:
-            root_topic['topics'] = filter_empty_or_ignore_topic(sub_topics)
+            with stage(STAGE_FILTER, len(sub_topics)):
+                root_topic['topics'] = filter_empty_or_ignore_topic(sub_topics, options)
         else:
             logging.warning('This is a blank sheet(%s), should have at least 1 sub topic(test suite)', sheet['title'])
             continue
-        suite = sheet_to_suite(root_topic)
+        with stage(STAGE_PARSE) as parse_stage:
+            suite = sheet_to_suite(root_topic, options)
+            parse_stage.add(count_testcases(suite))
         # suite.sheet_name = sheet['title']  # root testsuite has a sheet_name attribute
-        logging.debug('sheet(%s) parsing complete: %s', sheet['title'], suite.to_dict())
+        logging.debug('sheet(%s) parsing complete: %s testsuites', sheet['title'], len(suite.sub_suites))
+        suites.append(suite)
+
+    return suites
+
+
+def parallel_xmind_to_testsuites(xmind_content_dict, options, workers):
+    """Hand the testsuites of all sheets to a process pool, and put them back to their sheets in original order
+
+    A testsuite is the unit of work, so both workbooks with many sheets and single huge sheets are spread
+    over the workers. Only the top level topics are filtered here, the rest is done by the workers.
+    """
+    suites = []
+    suite_counts = []
+    tasks = []
+
+    for sheet in xmind_content_dict:
+        root_topic = sheet['topic']
+        sub_topics = root_topic.get('topics', [])
+
+        if not sub_topics:
+            logging.warning('This is a blank sheet(%s), should have at least 1 sub topic(test suite)', sheet['title'])
+            continue
+
+        with stage(STAGE_FILTER, len(sub_topics)):
+            root_topic['topics'] = _filter_topics(sub_topics, options)
+        suite = TestSuite()
+        suite.name, sheet_options = parse_root_title(root_topic['title'], options)
+        suite.details = root_topic['note']
         suites.append(suite)
+        suite_counts.append(len(root_topic['topics']))
+        tasks.extend((suite_dict, sheet_options) for suite_dict in root_topic['topics'])
+
+    parsed = []
+    if tasks:
+        from concurrent.futures import ProcessPoolExecutor  # multiprocessing is only loaded for a parallel parse
+        workers = min(workers, len(tasks))
+        chunksize = max(1, len(tasks) // (workers * 4))
+        logging.debug('parse %s testsuites on %s processes', len(tasks), workers)
+
+        with stage(STAGE_PARSE) as parse_stage, ProcessPoolExecutor(max_workers=workers) as executor:
+            parsed = list(executor.map(_filter_and_parse_testsuite, tasks, chunksize=chunksize))
+            parse_stage.add(sum(len(testsuite.testcase_list) for testsuite in parsed))
+
+    offset = 0
+    for suite, suite_count in zip(suites, suite_counts):
+        suite.sub_suites = parsed[offset:offset + suite_count]
+        offset += suite_count
 
     return suites
 
 
-def filter_empty_or_ignore_topic(topics):
-    """Filter blank or start with config.ignore_char topic"""
-    result = [topic for topic in topics if not (
-            topic['title'] is None or
-            topic['title'].strip() == '' or
-            topic['title'][0] in config['ignore_char'])]
+def _filter_and_parse_testsuite(task):
+    suite_dict, options = task
+    suite_dict['topics'] = filter_empty_or_ignore_topic(suite_dict.get('topics', []), options)
+    return parse_testsuite(suite_dict, options)
+
+
+def iter_xmind_testcases(xmind_content_dict, options=None):
+    """Yield (product name, suite name, `TestCase`) one by one, without building the `TestSuite` tree"""
+    options = get_parse_options(options)
+
+    for sheet in xmind_content_dict:
+        root_topic = sheet['topic']
+        sub_topics = root_topic.get('topics', [])
+
+        if not sub_topics:
+            logging.warning('This is a blank sheet(%s), should have at least 1 sub topic(test suite)', sheet['title'])
+            continue
+
+        with stage(STAGE_FILTER, len(sub_topics)):
+            root_topic['topics'] = filter_empty_or_ignore_topic(sub_topics, options)
+        product, sheet_options = parse_root_title(root_topic['title'], options)
+
+        for suite_dict in root_topic['topics']:
+            for cases_dict in suite_dict.get('topics', []):
+                cases = recurse_parse_testcase(cases_dict, options=sheet_options)
+                if has_hooks():
+                    # parse the topic's testcases at once, so the consumer's time isn't taken as the parse time
+                    with stage(STAGE_PARSE) as parse_stage:
+                        cases = list(cases)
+                        parse_stage.add(len(cases))
+                for case in cases:
+                    yield product, suite_dict['title'], case
+
+
+def count_testcases(suite):
+    """Count the testcases of a sheet's `TestSuite`"""
+    return sum(len(sub_suite.testcase_list) for sub_suite in suite.sub_suites or [])
+
+
+def filter_empty_or_ignore_topic(topics, options=None):
+    """Filter blank or start with config.ignore_char topic, iteratively to bear very deep maps"""
+    options = get_parse_options(options)
+    result = _filter_topics(topics, options)
+    stack = list(result)
 
-    for topic in result:
-        sub_topics = topic.get('topics', [])
-        topic['topics'] = filter_empty_or_ignore_topic(sub_topics)
+    while stack:
+        topic = stack.pop()
+        topic['topics'] = _filter_topics(topic.get('topics', []), options)
+        stack.extend(topic['topics'])
 
     return result
 
 
-def filter_empty_or_ignore_element(values):
+def _filter_topics(topics, options):
+    return [topic for topic in topics if not (topic['title'] is None or options.is_ignored(topic['title']))]
+
+
+def filter_empty_or_ignore_element(values, options=None):
     """Filter all empty or ignore XMind elements, especially notes、comments、labels element"""
+    options = get_parse_options(options)
     result = []
     for value in values:
-        if isinstance(value, str) and not value.strip() == '' and not value[0] in config['ignore_char']:
-            result.append(value.strip())
+        value = _filter_element(value, options)
+        if value:
+            result.append(value)
     return result
 
 
-def sheet_to_suite(root_topic):
-    """convert a xmind sheet to a `TestSuite` instance"""
-    suite = TestSuite()
-    root_title = root_topic['title']
+def parse_root_title(root_title, options=None):
+    """Find the testcase title separator at the end of the root topic's title
+
+    :return: the title without the separator, and a copy of the options carrying the separator
+    """
+    options = get_parse_options(options)
     separator = root_title[-1]
 
-    if separator in config['valid_sep']:
+    if separator in options.valid_sep:
         logging.debug('find a valid separator for connecting testcase title: %s', separator)
-        config['sep'] = separator  # set the separator for the testcase's title
-        root_title = root_title[:-1]
-    else:
-        config['sep'] = ' '
+        return root_title[:-1], options._replace(sep=separator)
+
+    return root_title, options._replace(sep=' ')
 
-    suite.name = root_title
+
+def sheet_to_suite(root_topic, options=None):
+    """convert a xmind sheet to a `TestSuite` instance"""
+    suite = TestSuite()
+    suite.name, sheet_options = parse_root_title(root_topic['title'], options)
     suite.details = root_topic['note']
     suite.sub_suites = []
 
     for suite_dict in root_topic['topics']:
-        suite.sub_suites.append(parse_testsuite(suite_dict))
+        suite.sub_suites.append(parse_testsuite(suite_dict, sheet_options))
 
     return suite
 
 
-def parse_testsuite(suite_dict):
+def parse_testsuite(suite_dict, options=None):
+    """convert a testsuite topic to a `TestSuite` instance, the options should carry the sheet's separator"""
+    options = get_parse_options(options)
     testsuite = TestSuite()
     testsuite.name = suite_dict['title']
     testsuite.details = suite_dict['note']
@@ -102,39 +262,111 @@ def parse_testsuite(suite_dict):
     logging.debug('start to parse a testsuite: %s', testsuite.name)
 
     for cases_dict in suite_dict.get('topics', []):
-        for case in recurse_parse_testcase(cases_dict):
+        for case in recurse_parse_testcase(cases_dict, options=options):
             testsuite.testcase_list.append(case)  # 此处将解析的测试用例添加到testsuite的testcase_list中
 
-    logging.debug('testsuite(%s) parsing complete: %s', testsuite.name, testsuite.to_dict())
+    logging.debug('testsuite(%s) parsing complete: %s testcases', testsuite.name, len(testsuite.testcase_list))
     return testsuite
 
 
-def recurse_parse_testcase(case_dict, parent=None):
-    if is_testcase_topic(case_dict):
-        if parm := is_testcase_parmed(case_dict):
-            for combie in gen_orth_com(*(parm.values())):
-                # 将case_dict里面对应parm的值，替换为combie，生成新的case_dict
-                parm_map = {k: v for k, v in zip(parm.keys(), combie)}
-                print(parm_map)
-                case_dict['title'] = case_dict['title'].format(**parm_map)
-                # case_dict['comment'] = json.dumps(parm_map)
-                # 然后调用parse_a_testcase生成测试用例
-                # case_dict['comment'] = json.dumps(dict(zip(parm.keys(), combie)))
-                case = parse_a_testcase(case_dict, parent)
-                return case
-        case = parse_a_testcase(case_dict, parent)
-        yield case
-    else:
-        if not parent:
-            parent = []
+class TopicChain(object):
+    """The filtered contents accumulated along a testcase's topic path, each topic is normalized only once"""
+
+    __slots__ = ('options', 'titles', 'note_count', 'preconditions', 'comment_count', 'summary', 'labels')
+
+    def __init__(self, options, titles=(), note_count=0, preconditions='', comment_count=0, summary='', labels=()):
+        """
+        TopicChain
+        :param options: the `ParseOptions` of the sheet
+        :param titles: the last two titles, which make up the testcase title
+        :param note_count: the number of notes
+        :param preconditions: the numbered notes joined by options.precondition_sep
+        :param comment_count: the number of comments
+        :param summary: the comments joined by options.summary_sep
+        :param labels: all labels, from the outermost topic
+        """
+        self.options = options
+        self.titles = titles
+        self.note_count = note_count
+        self.preconditions = preconditions
+        self.comment_count = comment_count
+        self.summary = summary
+        self.labels = labels
+
+    @classmethod
+    def from_topics(cls, topics, options=None):
+        chain = cls(get_parse_options(options))
+        for topic in topics:
+            chain = chain.extend(topic)
+        return chain
+
+    def extend(self, topic):
+        """Return a new chain with the topic appended"""
+        options = self.options
+        chain = TopicChain(options, self.titles, self.note_count, self.preconditions, self.comment_count,
+                           self.summary, self.labels)
+
+        title = _filter_element(topic['title'], options)
+        if title:
+            chain.titles = (self.titles[-1], title) if self.titles else (title,)
+
+        note = _filter_element(topic.get('note', ''), options)
+        if note:
+            chain.note_count += 1
+            pre_note = f'{chain.note_count}. {note}'
+            chain.preconditions = options.precondition_sep.join((self.preconditions, pre_note)) \
+                if self.preconditions else pre_note
+
+        comment = _filter_element(topic.get('comment'), options)
+        if comment:
+            if not self.comment_count:
+                try:
+                    json.loads(comment)
+                except json.JSONDecodeError:
+                    logging.warning(f'测试用例的注释信息格式错误: {comment}')
+            chain.comment_count += 1
+            chain.summary = options.summary_sep.join((self.summary, comment)) if self.comment_count else comment
+
+        label = _filter_element(topic.get('label', ''), options)
+        if label:
+            chain.labels = self.labels + (label,)
+
+        return chain
+
+
+def _filter_element(value, options):
+    """Return the stripped value, or None if it is empty or ignored, see `filter_empty_or_ignore_element`"""
+    if isinstance(value, str) and not options.is_ignored(value):
+        return value.strip()
+
+
+def recurse_parse_testcase(case_dict, parent=None, options=None):
+    """Yield all testcases under the topic in order
+
+    The topics are traversed with an explicit stack instead of recursion, and the ancestors' contents are
+    accumulated in a `TopicChain`, so the cost of a testcase no longer depends on its depth.
+    """
+    stack = [(case_dict, TopicChain.from_topics(parent or [], options))]
+
+    while stack:
+        topic, chain = stack.pop()
+
+        if is_testcase_topic(topic):
+            yield from parse_testcase_topic(topic, chain)
+        else:
+            sub_chain = chain.extend(topic)
+            stack.extend((child_dict, sub_chain) for child_dict in reversed(topic.get('topics', [])))
 
-        parent.append(case_dict)
 
-        for child_dict in case_dict.get('topics', []):
-            for case in recurse_parse_testcase(child_dict, parent):
-                yield case
+def parse_testcase_topic(case_dict, chain):
+    """Yield the testcase of a topic, or one testcase per parameter combination if it's parameterized"""
+    parm = is_testcase_parmed(case_dict)
+    if not parm:
+        yield chain_to_testcase(case_dict, chain)
+        return
 
-        parent.pop()
+    for parm_map in iter_combinations(parm, chain.options.parm_mode, chain.options.parm_limit):
+        yield chain_to_testcase(case_dict, chain, parm_map)
 
 
 def is_testcase_topic(case_dict):
@@ -151,49 +383,64 @@ def is_testcase_topic(case_dict):
 
 
 def is_testcase_parmed(case_dict):
+    """Return the parameters {name: [value, ...]} if the topic's comment is a JSON object, otherwise False
+
+    A single value is taken as a one value list, and the parameters without any value are dropped.
+    """
     summary = case_dict.get('comment', '')
     if summary:
         try:
             parm = json.loads(summary)
         except json.JSONDecodeError:
             return False
-        return parm
+        if not isinstance(parm, dict):
+            return False
+
+        parm = {str(name): values if isinstance(values, list) else [values] for name, values in parm.items()}
+        return {name: values for name, values in parm.items() if values} or False
     return False
 
 
 def gen_orth_com(*args):
     """
-    生成多个输入参数的正交组合
+    生成多个输入参数的所有组合（笛卡尔积），按需逐个生成
     :param args: 每个参数的可能取值，输入形式为：参数1取值, 参数2取值, ...
-    :return: 所有可能的组合
+    :return: 所有可能组合的迭代器
     """
-    # 使用 itertools.product 生成笛卡尔积
-    print(args)
-    combinations = list(itertools.product(*args))
-    for idx, combo in enumerate(combinations):
-        print(f"组合 {idx + 1}: {combo}")
-    return combinations
+    return itertools.product(*args)
 
 
-def parse_a_testcase(case_dict, parent):
-    testcase = TestCase()
-    topics = parent + [case_dict] if parent else [case_dict]
+def parse_a_testcase(case_dict, parent, options=None):
+    return chain_to_testcase(case_dict, TopicChain.from_topics(parent or [], options))
+
+
+def chain_to_testcase(case_dict, chain, parm_map=None):
+    """Convert a testcase topic to a `TestCase`, with its ancestors' contents accumulated in the chain
 
-    summary, parm_dict = gen_testcase_summary(topics)
-    testcase.summary = summary if summary else '无'
-    testcase.name = gen_testcase_title(topics)
-    # expand_summary_parms(testcase.name, parm_dict)
+    :param parm_map: a parameter combination {name: value}, it's filled into the title and steps,
+                     and takes the place of the topic's comment, the topic itself is left untouched
+    """
+    testcase = TestCase()
+    if parm_map is not None:
+        case_dict = dict(case_dict,
+                         title=format_with_parm(case_dict['title'], parm_map),
+                         comment=json.dumps(parm_map, ensure_ascii=False))
+    chain = chain.extend(case_dict)
 
-    preconditions = gen_testcase_preconditions(topics)
-    testcase.preconditions = preconditions if preconditions else '无'
+    testcase.summary = chain.summary if chain.summary else NO_CONTENT
+    testcase.name = chain.options.sep.join(chain.titles)
+    testcase.preconditions = chain.preconditions if chain.preconditions else NO_CONTENT
 
-    testcase.execution_type = get_execution_type(topics)
+    testcase.execution_type = list(chain.labels)
     testcase.importance = get_priority(case_dict) or 2
 
     step_dict_list = case_dict.get('topics', [])
     if step_dict_list:
         testcase.steps = parse_test_steps(step_dict_list)
-    # print(testcase.steps)
+        if parm_map is not None:
+            for step in testcase.steps:
+                step.actions = format_with_parm(step.actions, parm_map)
+                step.expected_results = format_with_parm(step.expected_results, parm_map)
 
     # the result of the testcase take precedence over the result of the teststep
     testcase.result = get_test_result(case_dict['markers'])
@@ -209,18 +456,13 @@ def parse_a_testcase(case_dict, parent):
 
             testcase.result = step.result  # there is no need to judge where test step are ignored
 
-    if testcase.steps:
-        for step in testcase.steps:
-            step.actions = step.actions
-            step.expected_results = step.expected_results
-
-    logging.debug('finds a testcase: %s', testcase.to_dict())
+    logging.debug('finds a testcase: %s, %s steps', testcase.name, len(testcase.steps or []))
     return testcase
 
 
-def get_execution_type(topics):
+def get_execution_type(topics, options=None):
     labels = [topic.get('label', '') for topic in topics]
-    labels = filter_empty_or_ignore_element(labels)
+    labels = filter_empty_or_ignore_element(labels, options)
     exe_type = 1
     for item in labels[::-1]:
         if item.lower() in ['自动', 'auto', 'automate', 'automation']:
@@ -236,16 +478,17 @@ def get_priority(case_dict):
     """Get the topic's priority（equivalent to the importance of the testcase)"""
     if isinstance(case_dict['markers'], list):
         for marker in case_dict['markers']:
-            if marker.startswith('priority'):
+            if marker.startswith(PRIORITY_MARKER_PREFIX):
                 return int(marker[-1])
 
 
-def gen_testcase_title(topics):
+def gen_testcase_title(topics, options=None):
     """Link all topic's title as testcase title"""
+    options = get_parse_options(options)
     titles = [topic['title'] for topic in topics]
-    titles = filter_empty_or_ignore_element(titles)
+    titles = filter_empty_or_ignore_element(titles, options)
 
-    separator = config['sep']
+    separator = options.sep
     # if separator != ' ':
     #     separator = f' {separator} '
     # 只保留titles最后两级的标题
@@ -260,31 +503,33 @@ def title_trim(title):
         return title
 
 
-def gen_testcase_preconditions(topics):
+def gen_testcase_preconditions(topics, options=None):
+    options = get_parse_options(options)
     try:
         # 过滤空或被忽略的备注信息
-        notes = filter_empty_or_ignore_element([topic.get('note', '') for topic in topics])
+        notes = filter_empty_or_ignore_element([topic.get('note', '') for topic in topics], options)
 
         # 使用列表推导式生成预条件字符串
         pre_all = [f'{pre_num}. {pre_note}' for pre_num, pre_note in enumerate(notes, 1)]
 
         # 返回连接后的预条件字符串
-        return config['precondition_sep'].join(pre_all) if pre_all else '无'
+        return options.precondition_sep.join(pre_all) if pre_all else NO_CONTENT
     except Exception as e:
         logging.error(f'生成预条件时发生错误: {e}')
         return '生成预条件时出错'
 
 
-def gen_testcase_summary(topics):
+def gen_testcase_summary(topics, options=None):
+    options = get_parse_options(options)
     comments = [topic['comment'] for topic in topics]
-    comments = filter_empty_or_ignore_element(comments)
+    comments = filter_empty_or_ignore_element(comments, options)
     parm_dict = {}
     if comments:
         try:
             parm_dict = json.loads(comments[0])
         except json.JSONDecodeError:
             logging.warning(f'测试用例的注释信息格式错误: {comments[0]}')
-    return config['summary_sep'].join(comments), parm_dict
+    return options.summary_sep.join(comments), parm_dict
 
 
 def parse_test_steps(step_dict_list):
@@ -307,28 +552,18 @@ def parse_a_test_step(step_dict):
         markers = expected_topic['markers']
         test_step.result = get_test_result(markers)
     else:  # only have test step
-        test_step.expected_results = "_"
+        test_step.expected_results = NO_EXPECTED_RESULT
         markers = step_dict['markers']
         test_step.result = get_test_result(markers)
 
-    logging.debug('finds a teststep: %s', test_step.to_dict())
     return test_step
 
 
 def get_test_result(markers):
     """test result: non-execution:0, pass:1, failed:2, blocked:3, skipped:4"""
     if isinstance(markers, list):
-        if 'symbol-right' in markers or 'c_simbol-right' in markers:
-            result = 1
-        elif 'symbol-wrong' in markers or 'c_simbol-wrong' in markers:
-            result = 2
-        elif 'symbol-pause' in markers or 'c_simbol-pause' in markers:
-            result = 3
-        elif 'symbol-minus' in markers or 'c_simbol-minus' in markers:
-            result = 4
-        else:
-            result = 0
-    else:
-        result = 0
+        results = [RESULT_MARKERS[marker] for marker in markers if marker in RESULT_MARKERS]
+        if results:
+            return min(results)
 
-    return result
+    return 0
@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+# _*_ coding:utf-8 _*_
+import logging
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from xmind2testcase.parser import count_testcases
+from xmind2testcase.testlink import xmind_to_testlink_xml_file
+from xmind2testcase.utils import get_absolute_path, get_xmind_testsuites, xmind_testcase_to_json_file, \
+    xmind_testsuite_to_json_file, xmind_testcase_to_jsonl_file
+from xmind2testcase.zentao import xmind_to_zentao_csv_file, xmind_to_metersphere_xlsx_file
+
+"""
+Convert a XMind file to several formats with a single parse
+
+    result = convert('testcase.xmind', sinks=['json', 'xml', 'csv', 'xlsx'])
+    print(format_timings(result))
+
+The file is parsed once, by the first sink whose output is out of date, and every sink reads the same parsed
+testsuites. The sinks write concurrently on a thread pool, an up to date output is reused without parsing.
+"""
+
+# sink name: converter(xmind_file, options=..., testsuites=...) -> output file
+SINKS = OrderedDict([
+    ('json', xmind_testcase_to_json_file),
+    ('testsuite_json', xmind_testsuite_to_json_file),
+    ('jsonl', xmind_testcase_to_jsonl_file),
+    ('xml', xmind_to_testlink_xml_file),
+    ('csv', xmind_to_zentao_csv_file),
+    ('xlsx', xmind_to_metersphere_xlsx_file),
+])
+DEFAULT_SINKS = ('json', 'xml', 'csv')
+
+ConvertResult = namedtuple('ConvertResult', ['xmind_file', 'outputs', 'timings', 'parse_time', 'total_time',
+                                             'testcase_count'])
+
+
+def check_sinks(sinks):
+    """Raise a ValueError if any of the sink names isn't in `SINKS`"""
+    unknown = [sink for sink in sinks if sink not in SINKS]
+    if unknown:
+        raise ValueError('Unknown sinks: %s, the available sinks: %s' % (', '.join(unknown), ', '.join(SINKS)))
+
+
+class TestsuitesLoader(object):
+    """Parse the XMind file on the first call and return the same testsuites to every caller, thread safe
+
+    The time a call spends parsing or waiting for the parse is kept per thread in `waited`,
+    so a sink's own time can be told apart. A file that can't be read or has no testsuite raises
+    a ValueError in every sink, so none of them writes an empty output.
+    """
+
+    def __init__(self, xmind_file, options=None):
+        self.xmind_file = xmind_file
+        self.options = options
+        self.testsuites = None
+        self.parse_time = 0.0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def __call__(self):
+        start = time.perf_counter()
+        with self._lock:
+            if self.testsuites is None:
+                self.testsuites = get_xmind_testsuites(self.xmind_file, options=self.options)
+                self.parse_time = time.perf_counter() - start
+        self._local.waited = self.waited + time.perf_counter() - start
+        if not self.testsuites:
+            raise ValueError('Invalid XMind file(%s): no testsuite can be read from it' % self.xmind_file)
+        return self.testsuites
+
+    @property
+    def waited(self):
+        return getattr(self._local, 'waited', 0.0)
+
+    def reset_waited(self):
+        self._local.waited = 0.0
+
+
+def convert(xmind_file, sinks=DEFAULT_SINKS, options=None, max_workers=None):
+    """Parse the XMind file once and write it to every sink
+
+    :param sinks: the sink names, see `SINKS`
+    :param options: the `xmind2testcase.parser.ParseOptions`
+    :param max_workers: the size of the thread pool, one thread per sink by default,
+                        1 writes the sinks one by one in the calling thread
+    :return: a `ConvertResult`: the output file and the own time (seconds) of every sink, the parse time,
+             the total time, and the number of testcases (None if every output was up to date and nothing was parsed)
+    :raise ValueError: if the file can't be read or has no testsuite, no output is written then
+    """
+    check_sinks(sinks)
+
+    start = time.perf_counter()
+    xmind_file = get_absolute_path(xmind_file)
+    loader = TestsuitesLoader(xmind_file, options)
+    logging.info('Start converting XMind file(%s) to %s...', xmind_file, ', '.join(sinks))
+
+    def run(sink):
+        loader.reset_waited()
+        sink_start = time.perf_counter()
+        output_file = SINKS[sink](xmind_file, options=options, testsuites=loader)
+        return output_file, time.perf_counter() - sink_start - loader.waited
+
+    if max_workers == 1:
+        results = [run(sink) for sink in sinks]
+    else:
+        with ThreadPoolExecutor(max_workers=max_workers or max(1, len(sinks))) as executor:
+            results = list(executor.map(run, sinks))
+
+    outputs = OrderedDict((sink, output_file) for sink, (output_file, _) in zip(sinks, results))
+    timings = OrderedDict((sink, elapsed) for sink, (_, elapsed) in zip(sinks, results))
+    testcase_count = None if loader.testsuites is None else sum(count_testcases(suite) for suite in loader.testsuites)
+    return ConvertResult(xmind_file, outputs, timings, loader.parse_time, time.perf_counter() - start, testcase_count)
+
+
+def format_timings(result):
+    """A table of the parse time and every sink's time and output file"""
+    lines = ['%-15s %10.2f ms' % ('parse', result.parse_time * 1000)]
+    for sink, elapsed in result.timings.items():
+        lines.append('%-15s %10.2f ms  %s' % (sink, elapsed * 1000, result.outputs[sink]))
+    lines.append('%-15s %10.2f ms' % ('total', result.total_time * 1000))
+    return '\n'.join(lines)
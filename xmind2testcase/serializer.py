@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+# _*_ coding:utf-8 _*_
+import json
+
+from xmind2testcase.instrument import stage, STAGE_SERIALIZE
+from xmind2testcase.metadata import TestSuite
+
+"""
+Write JSON incrementally, formatted exactly like `json.dumps(value, indent=4, separators=(',', ': '), ensure_ascii=False)`
+
+`TestSuite` objects are walked field by field, so only one testcase is turned into a dict at a time,
+lists and iterators are written item by item, and the text is flushed to the file in bounded chunks.
+
+JSON Lines are written with `dump_jsonl`: one compact JSON object per line.
+The text is produced in the serialize stage and written to the file out of it, see `write_chunks`.
+"""
+
+INDENT = 4
+CHUNK_SIZE = 64 * 1024
+
+
+def dump_json(value, f, chunk_size=CHUNK_SIZE):
+    """Write the value as indented JSON to a text file object
+
+    :param value: a JSON value, which may contain `TestSuite`/`TestCase`/`TestStep` objects and iterators
+    :param chunk_size: the number of characters buffered before a write
+    """
+    write_chunks(iter_json_chunks(value), f, chunk_size, count=False)
+
+
+def dump_jsonl(items, f, chunk_size=CHUNK_SIZE):
+    """Write the items as JSON Lines to a text file object, one compact JSON value per line
+
+    :return: the number of written lines
+    """
+    lines = (json.dumps(item.to_dict() if hasattr(item, 'to_dict') else item,
+                        separators=(',', ':'), ensure_ascii=False) + '\n' for item in items)
+    return write_chunks(lines, f, chunk_size)
+
+
+def write_chunks(chunks, f, chunk_size=CHUNK_SIZE, count=True):
+    """Join the text chunks and write them to a text file object every `chunk_size` characters
+
+    The chunks are pulled in the serialize stage, so a lazy source is timed as the serialization
+    (and its own nested stages), and only the file writes are left out of it.
+
+    :param count: add the number of chunks to the handled objects of the serialize stage
+    :return: the number of chunks
+    """
+    chunks = iter(chunks)
+    total = 0
+    while True:
+        with stage(STAGE_SERIALIZE) as serialize_stage:
+            buffer = []
+            size = 0
+            for chunk in chunks:
+                buffer.append(chunk)
+                size += len(chunk)
+                if size >= chunk_size:
+                    break
+            if count:
+                serialize_stage.add(len(buffer))
+        if not buffer:
+            return total
+        f.write(''.join(buffer))
+        total += len(buffer)
+
+
+def iter_json_chunks(value, level=0):
+    """Yield the JSON text of the value piece by piece, `level` is the indent level of the value"""
+    if isinstance(value, TestSuite):
+        yield from _iter_suite_chunks(value, level)
+    elif hasattr(value, 'to_dict'):
+        yield _dumps(value.to_dict(), level)
+    elif isinstance(value, dict) or isinstance(value, (str, bytes)) or not hasattr(value, '__iter__'):
+        yield _dumps(value, level)
+    else:
+        yield from _iter_array_chunks(value, level)
+
+
+def _iter_array_chunks(items, level):
+    item_indent = ' ' * (INDENT * (level + 1))
+    is_empty = True
+
+    for item in items:
+        yield ('[\n' if is_empty else ',\n') + item_indent
+        is_empty = False
+        yield from iter_json_chunks(item, level + 1)
+
+    yield '[]' if is_empty else '\n' + ' ' * (INDENT * level) + ']'
+
+
+def _iter_suite_chunks(suite, level):
+    field_indent = ' ' * (INDENT * (level + 1))
+    fields = [('name', suite.name), ('details', suite.details),
+              ('testcase_list', suite.testcase_list or []), ('sub_suites', suite.sub_suites or [])]
+    if suite.statistics:
+        fields.append(('statistics', suite.statistics))
+
+    for index, (key, value) in enumerate(fields):
+        yield ('{\n' if index == 0 else ',\n') + field_indent + _dumps(key, 0) + ': '
+        yield from iter_json_chunks(value, level + 1)
+
+    yield '\n' + ' ' * (INDENT * level) + '}'
+
+
+def _dumps(value, level):
+    text = json.dumps(value, indent=INDENT, separators=(',', ': '), ensure_ascii=False)
+    if level and '\n' in text:  # a JSON text has no raw line break but the indent ones
+        text = text.replace('\n', '\n' + ' ' * (INDENT * level))
+    return text
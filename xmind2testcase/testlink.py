@@ -1,45 +1,54 @@
 #!/usr/bin/env python
 # _*_ coding:utf-8 _*_
 import logging
-import os
 from io import BytesIO
-from xml.dom import minidom
-from xml.sax.saxutils import escape
 from xmind2testcase import const
-from xmind2testcase.parser import config
-from xmind2testcase.utils import get_xmind_testsuites, get_absolute_path
+from xmind2testcase.artifact import gen_artifact_meta, convert_artifact
+from xmind2testcase.instrument import stage, STAGE_WRITE
+from xmind2testcase.parser import get_parse_options
+from xmind2testcase.serializer import write_chunks
+from xmind2testcase.utils import resolve_testsuites, get_absolute_path
 from xml.etree.ElementTree import Element, SubElement, ElementTree, Comment
 
 """
 Convert XMind fie to TestLink testcase xml file 
+
+The xml file is written by `write_testlink_xml` testcase by testcase, in the layout `minidom.toprettyxml(indent='\t')`
+gives to the content of `testsuites_to_xml_content`: every CDATA text is wrapped by the empty comments
+which keep it readable in the ElementTree output.
 """
 
+XML_DECLARATION = '<?xml version="1.0" ?>\n'
+INDENT = '\t'
+
 
-def xmind_to_testlink_xml_file(xmind_file, is_all_sheet=True):
-    """Convert a XMind sheet to a testlink xml file"""
+def xmind_to_testlink_xml_file(xmind_file, is_all_sheet=True, options=None, testsuites=None):
+    """Convert a XMind sheet to a testlink xml file
+
+    :param testsuites: the parsed testsuites of the file or a loader of them, see `utils.resolve_testsuites`
+    """
     xmind_file = get_absolute_path(xmind_file)
     logging.info('Start converting XMind file(%s) to testlink file...', xmind_file)
-    testsuites = get_xmind_testsuites(xmind_file)
-    if not is_all_sheet and testsuites:
-        testsuites = [testsuites[0]]
-
-    xml_content = testsuites_to_xml_content(testsuites)
     testlink_xml_file = xmind_file[:-6] + '.xml'
 
-    if os.path.exists(testlink_xml_file):
-        logging.info('the testlink xml file already exists, return it directly: %s', testlink_xml_file)
-        return testlink_xml_file
+    def write(f):
+        parsed = resolve_testsuites(xmind_file, options, testsuites)
+        if not is_all_sheet and parsed:
+            parsed = [parsed[0]]
 
-    with open(testlink_xml_file, 'w', encoding='utf-8') as f:
-        pretty_content = minidom.parseString(xml_content).toprettyxml(indent='\t')
-        f.write(pretty_content)
-        logging.info('convert XMind file(%s) to a testlink xml file(%s) successfully!', xmind_file, testlink_xml_file)
+        with stage(STAGE_WRITE, len(parsed)):
+            write_testlink_xml(parsed, f, options)
+
+    meta = gen_artifact_meta(xmind_file, 'testlink', options, is_all_sheet=is_all_sheet)
+    convert_artifact(testlink_xml_file, meta, write)
+    logging.info('convert XMind file(%s) to a testlink xml file(%s) successfully!', xmind_file, testlink_xml_file)
 
     return testlink_xml_file
 
 
-def testsuites_to_xml_content(testsuites):
+def testsuites_to_xml_content(testsuites, options=None):
     """Convert the testsuites to testlink xml file format"""
+    options = get_parse_options(options)
     root_element = Element(const.TAG_TESTSUITE)
     # setting the root suite's name attribute, that will generate a new testsuite folder on testlink
     # root_element.set(const.ATTR_NAME, testsuite.name)
@@ -47,15 +56,15 @@ def testsuites_to_xml_content(testsuites):
     for testsuite in testsuites:
         suite_element = SubElement(root_element, const.TAG_TESTSUITE)
         suite_element.set(const.ATTR_NAME, testsuite.name)
-        gen_text_element(suite_element, const.TAG_DETAILS, testsuite.details)
+        gen_text_element(suite_element, const.TAG_DETAILS, testsuite.details, options)
 
         for sub_suite in testsuite.sub_suites:
-            if is_should_skip(sub_suite.name):
+            if is_should_skip(sub_suite.name, options):
                 continue
             sub_suite_element = SubElement(suite_element, const.TAG_TESTSUITE)
             sub_suite_element.set(const.ATTR_NAME, sub_suite.name)
-            gen_text_element(sub_suite_element, const.TAG_DETAILS, sub_suite.details)
-            gen_testcase_element(sub_suite_element, sub_suite)
+            gen_text_element(sub_suite_element, const.TAG_DETAILS, sub_suite.details, options)
+            gen_testcase_element(sub_suite_element, sub_suite, options)
 
     testlink = ElementTree(root_element)
     content_stream = BytesIO()
@@ -63,20 +72,120 @@ def testsuites_to_xml_content(testsuites):
     return content_stream.getvalue()
 
 
-def gen_testcase_element(suite_element, suite):
+def write_testlink_xml(testsuites, f, options=None):
+    """Write the testsuites as a pretty printed testlink xml to a text file object, the testcases are encoded
+    in the serialize stage and written in chunks"""
+    options = get_parse_options(options)
+    f.write(XML_DECLARATION)
+
+    if not testsuites:
+        f.write('<%s/>\n' % const.TAG_TESTSUITE)
+        return
+
+    f.write('<%s>\n' % const.TAG_TESTSUITE)
+    for testsuite in testsuites:
+        sub_suites = [sub_suite for sub_suite in testsuite.sub_suites if not is_should_skip(sub_suite.name, options)]
+        details = _text_element_xml(const.TAG_DETAILS, testsuite.details, INDENT * 2, options)
+        _write_suite_start(f, testsuite.name, INDENT, bool(details or sub_suites))
+        f.write(details)
+
+        for sub_suite in sub_suites:
+            testcases = [testcase for testcase in sub_suite.testcase_list
+                         if not is_should_skip(testcase.name, options)]
+            details = _text_element_xml(const.TAG_DETAILS, sub_suite.details, INDENT * 3, options)
+            _write_suite_start(f, sub_suite.name, INDENT * 2, bool(details or testcases))
+            f.write(details)
+
+            write_chunks((_testcase_xml(testcase, INDENT * 3, options) for testcase in testcases), f)
+
+            if details or testcases:
+                f.write('%s</%s>\n' % (INDENT * 2, const.TAG_TESTSUITE))
+
+        if details or sub_suites:
+            f.write('%s</%s>\n' % (INDENT, const.TAG_TESTSUITE))
+    f.write('</%s>\n' % const.TAG_TESTSUITE)
+
+
+def _write_suite_start(f, name, indent, has_children):
+    f.write('%s<%s %s="%s"%s\n' % (indent, const.TAG_TESTSUITE, const.ATTR_NAME, _escape_data(name),
+                                    '>' if has_children else '/>'))
+
+
+def _testcase_xml(testcase, indent, options):
+    child_indent = indent + INDENT
+    status = str(testcase.status) if testcase.status in (1, 2, 3, 4, 5, 6, 7) else '7'
+    parts = [
+        '%s<%s %s="%s">\n' % (indent, const.TAG_TESTCASE, const.ATTR_NAME, _escape_data(testcase.name)),
+        _text_element_xml(const.TAG_VERSION, str(testcase.version), child_indent, options),
+        _text_element_xml(const.TAG_SUMMARY, testcase.summary, child_indent, options),
+        _text_element_xml(const.TAG_PRECONDITIONS, testcase.preconditions, child_indent, options),
+        _text_element_xml(const.TAG_EXECUTION_TYPE, _convert_execution_type(testcase.execution_type), child_indent,
+                          options),
+        _text_element_xml(const.TAG_IMPORTANCE, _convert_importance(testcase.importance), child_indent, options),
+        _plain_element_xml(const.TAG_ESTIMATED_EXEC_DURATION, str(testcase.estimated_exec_duration), child_indent),
+        _plain_element_xml(const.TAG_STATUS, status, child_indent),
+    ]
+
+    if testcase.steps:
+        steps = [step for step in testcase.steps if not is_should_skip(step.actions, options)]
+        if steps:
+            parts.append('%s<%s>\n' % (child_indent, const.TAG_STEPS))
+            step_indent = child_indent + INDENT
+            for step in steps:
+                parts.append('%s<%s>\n' % (step_indent, const.TAG_STEP))
+                parts.append(_text_element_xml(const.TAG_STEP_NUMBER, str(step.step_number), step_indent + INDENT, options))
+                parts.append(_text_element_xml(const.TAG_ACTIONS, step.actions, step_indent + INDENT, options))
+                parts.append(_text_element_xml(const.TAG_EXPECTED_RESULTS, step.expected_results, step_indent + INDENT,
+                                               options))
+                parts.append(_text_element_xml(const.TAG_EXECUTION_TYPE, _convert_execution_type(step.execution_type),
+                                               step_indent + INDENT, options))
+                parts.append('%s</%s>\n' % (step_indent, const.TAG_STEP))
+            parts.append('%s</%s>\n' % (child_indent, const.TAG_STEPS))
+        else:
+            parts.append('%s<%s/>\n' % (child_indent, const.TAG_STEPS))
+
+    parts.append('%s</%s>\n' % (indent, const.TAG_TESTCASE))
+    return ''.join(parts)
+
+
+def _text_element_xml(tag_name, content, indent, options):
+    """The pretty printed element of `gen_text_element`, or '' if the content shouldn't be parsed"""
+    if not is_should_parse(content, options):
+        return ''
+    # an xml parser reads a carriage return as a line feed
+    cdata = gen_cdata_content(content).replace('\r', '\n')
+    child_indent = indent + INDENT
+    return '%s<%s>\n%s<!-- -->\n<![CDATA[%s]]>%s \n%s<!-- -->\n%s</%s>\n' % (
+        indent, tag_name, child_indent, cdata, child_indent, child_indent, indent, tag_name)
+
+
+def _plain_element_xml(tag_name, text, indent):
+    if not text:
+        return '%s<%s/>\n' % (indent, tag_name)
+    return '%s<%s>%s</%s>\n' % (indent, tag_name, _escape_data(text.replace('\r\n', '\n').replace('\r', '\n')),
+                                 tag_name)
+
+
+def _escape_data(data):
+    return data.replace('&', '&amp;').replace('<', '&lt;').replace('"', '&quot;').replace('>', '&gt;')
+
+
+def gen_testcase_element(suite_element, suite, options=None):
+    options = get_parse_options(options)
     for testcase in suite.testcase_list:
 
-        if is_should_skip(testcase.name):
+        if is_should_skip(testcase.name, options):
             continue
 
         testcase_elment = SubElement(suite_element, const.TAG_TESTCASE)
         testcase_elment.set(const.ATTR_NAME, testcase.name)
 
-        gen_text_element(testcase_elment, const.TAG_VERSION, str(testcase.version))
-        gen_text_element(testcase_elment, const.TAG_SUMMARY, testcase.summary)
-        gen_text_element(testcase_elment, const.TAG_PRECONDITIONS, testcase.preconditions)
-        gen_text_element(testcase_elment, const.TAG_EXECUTION_TYPE, _convert_execution_type(testcase.execution_type))
-        gen_text_element(testcase_elment, const.TAG_IMPORTANCE, _convert_importance(testcase.importance))
+        gen_text_element(testcase_elment, const.TAG_VERSION, str(testcase.version), options)
+        gen_text_element(testcase_elment, const.TAG_SUMMARY, testcase.summary, options)
+        gen_text_element(testcase_elment, const.TAG_PRECONDITIONS, testcase.preconditions, options)
+        gen_text_element(testcase_elment, const.TAG_EXECUTION_TYPE, _convert_execution_type(testcase.execution_type),
+                         options)
+        gen_text_element(testcase_elment, const.TAG_IMPORTANCE, _convert_importance(testcase.importance), options)
 
         estimated_exec_duration_element = SubElement(testcase_elment, const.TAG_ESTIMATED_EXEC_DURATION)
         estimated_exec_duration_element.text = str(testcase.estimated_exec_duration)
@@ -84,55 +193,61 @@ def gen_testcase_element(suite_element, suite):
         status = SubElement(testcase_elment, const.TAG_STATUS)
         status.text = str(testcase.status) if testcase.status in (1, 2, 3, 4, 5, 6, 7) else '7'
 
-        gen_steps_element(testcase_elment, testcase)
+        gen_steps_element(testcase_elment, testcase, options)
 
 
-def gen_steps_element(testcase_element, testcase):
+def gen_steps_element(testcase_element, testcase, options=None):
+    options = get_parse_options(options)
     if testcase.steps:
         steps_element = SubElement(testcase_element, const.TAG_STEPS)
 
         for step in testcase.steps:
 
-            if is_should_skip(step.actions):
+            if is_should_skip(step.actions, options):
                 continue
 
             step_element = SubElement(steps_element, const.TAG_STEP)
-            gen_text_element(step_element, const.TAG_STEP_NUMBER, str(step.step_number))
-            gen_text_element(step_element, const.TAG_ACTIONS, step.actions)
-            gen_text_element(step_element, const.TAG_EXPECTED_RESULTS, step.expected_results)
-            gen_text_element(step_element, const.TAG_EXECUTION_TYPE, _convert_execution_type(step.execution_type))
+            gen_text_element(step_element, const.TAG_STEP_NUMBER, str(step.step_number), options)
+            gen_text_element(step_element, const.TAG_ACTIONS, step.actions, options)
+            gen_text_element(step_element, const.TAG_EXPECTED_RESULTS, step.expected_results, options)
+            gen_text_element(step_element, const.TAG_EXECUTION_TYPE, _convert_execution_type(step.execution_type),
+                             options)
 
 
-def gen_text_element(parent_element, tag_name, content):
+def gen_text_element(parent_element, tag_name, content, options=None):
     """generate an element's text conent: <![CDATA[text]]>"""
-    if is_should_parse(content):
+    if is_should_parse(content, options):
         child_element = SubElement(parent_element, tag_name)
         element_set_text(child_element, content)
 
 
 def element_set_text(element, content):
-    # retain html tags in content
-    content = escape(content, entities={'\r\n': '<br />'})
+    # add CDATA for a element
+    element.append(Comment(' --><![CDATA[' + gen_cdata_content(content) + ']]> <!-- '))
+
+
+def gen_cdata_content(content):
+    """The text of a CDATA section: html tags are retained and line breaks become `<br />`"""
+    # retain html tags in content, escaped like `xml.sax.saxutils.escape` which would import urllib and email
+    content = content.replace('&', '&amp;').replace('>', '&gt;').replace('<', '&lt;').replace('\r\n', '<br />')
     # replace new line for *nix system
     content = content.replace('\n', '<br />')
     # add the line break in source to make it readable
     content = content.replace('<br />', '<br />\n')
 
-    # add CDATA for a element
-    element.append(Comment(' --><![CDATA[' + content.replace(']]>', ']]]]><![CDATA[>') + ']]> <!-- '))
+    return content.replace(']]>', ']]]]><![CDATA[>')
 
 
-def is_should_parse(content):
+def is_should_parse(content, options=None):
     """An element that has a string content and doesn't start with exclamation mark should be parsing"""
-    return isinstance(content, str) and content.strip() != '' and not content[0] in config['ignore_char']
+    return isinstance(content, str) and not get_parse_options(options).is_ignored(content)
 
 
-def is_should_skip(content):
+def is_should_skip(content, options=None):
     """A testsuite/testcase/teststep should be skip: 1、content is empty; 2、starts with config.ignore_char"""
     return content is None or \
         not isinstance(content, str) or \
-        content.strip() == '' or \
-        content[0] in config['ignore_char']
+        get_parse_options(options).is_ignored(content)
 
 
 def _convert_execution_type(value):
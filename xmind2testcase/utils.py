@@ -1,10 +1,22 @@
 #!/usr/bin/env python
 # _*_ coding:utf-8 _*_
-import json
+import gzip
+import io
 import os
-import xmind
+import threading
+import zipfile
 import logging
-from xmind2testcase.parser import xmind_to_testsuites
+from collections import OrderedDict
+from contextlib import contextmanager
+from xmind2testcase.artifact import gen_artifact_meta, convert_artifact
+from xmind2testcase.instrument import stage, lazy_dict, STAGE_LOAD, STAGE_WRITE
+from xmind2testcase.loader import load_workbook, CONTENT_XML, CONTENT_JSON, COMMENTS_XML
+from xmind2testcase.metadata import TestSuite
+from xmind2testcase.parser import xmind_to_testsuites, iter_xmind_testcases, get_parse_options
+from xmind2testcase.serializer import dump_json, dump_jsonl
+
+# the zip members whose uncompressed size approximates the memory held by a parsed workbook
+WORKBOOK_CONTENT_MEMBERS = (CONTENT_XML, CONTENT_JSON, COMMENTS_XML)
 
 
 def get_absolute_path(path):
@@ -22,22 +34,126 @@ def get_absolute_path(path):
     return os.path.join(fp, fn)
 
 
-def get_xmind_testsuites(xmind_file):
-    """Load the XMind file and parse to `xmind2testcase.metadata.TestSuite` list"""
+class WorkbookCache(object):
+    """A thread-safe LRU cache of parsed workbooks, bounded by entry count and estimated memory"""
+
+    def __init__(self, max_entries=16, max_bytes=256 * 1024 * 1024):
+        """
+        WorkbookCache
+        :param max_entries: the maximum number of cached workbooks
+        :param max_bytes: the maximum estimated memory (bytes) of all cached workbooks
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (testsuites, cost)
+        self._total_cost = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key, testsuites, cost=0):
+        if cost > self.max_bytes or self.max_entries <= 0:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._total_cost -= self._entries.pop(key)[1]
+
+            self._entries[key] = (testsuites, cost)
+            self._total_cost += cost
+
+            while len(self._entries) > self.max_entries or self._total_cost > self.max_bytes:
+                _, (_, evicted_cost) = self._entries.popitem(last=False)
+                self._total_cost -= evicted_cost
+
+    def discard(self, xmind_file):
+        """Drop every cached version of the XMind file"""
+        xmind_file = get_absolute_path(xmind_file)
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == xmind_file]:
+                self._total_cost -= self._entries.pop(key)[1]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._total_cost = 0
+
+
+# the process-wide parsed workbook cache shared by all converters and the webtool
+workbook_cache = WorkbookCache()
+
+
+def get_workbook_cache_key(xmind_file, options=None):
+    """Return the cache key of a XMind file: (absolute path, size, mtime, parse options), or None if it can't be stat"""
     xmind_file = get_absolute_path(xmind_file)
-    workbook = xmind.load(xmind_file)
-    xmind_content_dict = workbook.getData()
-    logging.debug("loading XMind file(%s) dict data: %s", xmind_file, xmind_content_dict)
+    try:
+        stat = os.stat(xmind_file)
+    except OSError:
+        return None
+    return xmind_file, stat.st_size, stat.st_mtime_ns, get_parse_options(options)
+
+
+def estimate_workbook_cost(xmind_file):
+    """Estimate the memory of a parsed workbook by the uncompressed size of its content members"""
+    try:
+        with zipfile.ZipFile(xmind_file) as zf:
+            return sum(info.file_size for info in zf.infolist() if info.filename in WORKBOOK_CONTENT_MEMBERS)
+    except (OSError, zipfile.BadZipFile):
+        return os.path.getsize(xmind_file) if os.path.exists(xmind_file) else 0
+
+
+def load_xmind_content(xmind_file):
+    """Load the XMind file as a list of sheet dict data"""
+    with stage(STAGE_LOAD) as load_stage:
+        xmind_content_dict = load_workbook(xmind_file)
+        load_stage.add(len(xmind_content_dict))
+    logging.debug('loading XMind file(%s) dict data: %s sheets', xmind_file, len(xmind_content_dict))
+    return xmind_content_dict
+
+
+def get_xmind_testsuites(xmind_file, use_cache=True, options=None, workers=None):
+    """Load the XMind file and parse to `xmind2testcase.metadata.TestSuite` list
+
+    The parsed testsuites are shared through `workbook_cache` until the file changes,
+    so the returned objects should be treated as read-only.
+
+    :param options: the `xmind2testcase.parser.ParseOptions`, compiled from `parser.config` by default
+    :param workers: parse on a pool of that many processes, worthwhile for big workbooks
+    """
+    xmind_file = get_absolute_path(xmind_file)
+    options = get_parse_options(options)
+    cache_key = get_workbook_cache_key(xmind_file, options) if use_cache else None
+
+    if cache_key:
+        testsuites = workbook_cache.get(cache_key)
+        if testsuites is not None:
+            logging.debug('hit the parsed workbook cache: %s', xmind_file)
+            return list(testsuites)
+
+    xmind_content_dict = load_xmind_content(xmind_file)
 
     if xmind_content_dict:
-        testsuites = xmind_to_testsuites(xmind_content_dict)
-        return testsuites
+        testsuites = xmind_to_testsuites(xmind_content_dict, options, workers)
     else:
         logging.error('Invalid XMind file(%s): it is empty!', xmind_file)
-        return []
+        testsuites = []
+
+    if cache_key:
+        workbook_cache.put(cache_key, testsuites, estimate_workbook_cost(xmind_file))
+
+    return list(testsuites)
 
 
-def get_xmind_testsuite_list(xmind_file):
+def get_xmind_testsuite_list(xmind_file, options=None):
     """Load the XMind file and get all testsuite in it
 
     :param xmind_file: the target XMind file
@@ -45,10 +161,22 @@ def get_xmind_testsuite_list(xmind_file):
     """
     xmind_file = get_absolute_path(xmind_file)
     logging.info('Start converting XMind file(%s) to testsuite data list...', xmind_file)
-    testsuite_list = get_xmind_testsuites(xmind_file)
-    suite_data_list = []
+    testsuite_list = gen_testsuites_statistics(get_xmind_testsuites(xmind_file, options=options))
+    suite_data_list = [testsuite.to_dict() for testsuite in testsuite_list]
 
-    for testsuite in testsuite_list:
+    logging.info('Convert XMind file(%s) to testsuite data list successfully!', xmind_file)
+    return suite_data_list
+
+
+def gen_testsuites_statistics(testsuites):
+    """Count the testcase results of every testsuite, return copies of the testsuites carrying their `statistics`
+
+    The given testsuites may be shared through `workbook_cache`, so they are left untouched:
+    the copies share the testcases with them.
+    """
+    suites_with_statistics = []
+    for testsuite in testsuites:
+        sub_suites = []
         product_statistics = {'case_num': 0, 'non_execution': 0, 'pass': 0, 'failed': 0, 'blocked': 0, 'skipped': 0}
         for sub_suite in testsuite.sub_suites:
             suite_statistics = {'case_num': len(sub_suite.testcase_list), 'non_execution': 0, 'pass': 0, 'failed': 0, 'blocked': 0, 'skipped': 0}
@@ -64,20 +192,18 @@ def get_xmind_testsuite_list(xmind_file):
                 elif case.result == 4:
                     suite_statistics['skipped'] += 1
                 else:
-                    logging.warning('This testcase result is abnormal: %s, please check it: %s', case.result, case.to_dict())
-            sub_suite.statistics = suite_statistics
+                    logging.warning('This testcase result is abnormal: %s, please check it: %s', case.result, lazy_dict(case))
+            sub_suites.append(TestSuite(sub_suite.name, sub_suite.details, sub_suite.testcase_list,
+                                        sub_suite.sub_suites, suite_statistics))
             for item in product_statistics:
                 product_statistics[item] += suite_statistics[item]
 
-        testsuite.statistics = product_statistics
-        suite_data = testsuite.to_dict()
-        suite_data_list.append(suite_data)
+        suites_with_statistics.append(TestSuite(testsuite.name, testsuite.details, testsuite.testcase_list, sub_suites,
+                                                product_statistics))
+    return suites_with_statistics
 
-    logging.info('Convert XMind file(%s) to testsuite data list successfully!', xmind_file)
-    return suite_data_list
 
-
-def get_xmind_testcase_list(xmind_file):
+def get_xmind_testcase_list(xmind_file, options=None):
     """Load the XMind file and get all testcase in it
 
     :param xmind_file: the target XMind file
@@ -85,9 +211,14 @@ def get_xmind_testcase_list(xmind_file):
     """
     xmind_file = get_absolute_path(xmind_file)
     logging.info('Start converting XMind file(%s) to testcases dict data...', xmind_file)
-    testsuites = get_xmind_testsuites(xmind_file)
-    testcases = []
+    testsuites = get_xmind_testsuites(xmind_file, options=options)
+    testcases = list(iter_testsuites_testcases(testsuites))
+    logging.info('Convert XMind file(%s) to testcases dict data successfully!', xmind_file)
+    return testcases
 
+
+def iter_testsuites_testcases(testsuites):
+    """Yield the testcase data of the parsed testsuites one by one"""
     for testsuite in testsuites:
         product = testsuite.name
         for suite in testsuite.sub_suites:
@@ -95,45 +226,121 @@ def get_xmind_testcase_list(xmind_file):
                 case_data = case.to_dict()
                 case_data['product'] = product
                 case_data['suite'] = suite.name
-                testcases.append(case_data)
+                yield case_data
 
-    logging.info('Convert XMind file(%s) to testcases dict data successfully!', xmind_file)
-    return testcases
 
+def resolve_testsuites(xmind_file, options=None, testsuites=None):
+    """Return the given parsed testsuites of the XMind file, or call it if it's a loader, or parse the file"""
+    if testsuites is None:
+        return get_xmind_testsuites(xmind_file, options=options)
+    return testsuites() if callable(testsuites) else testsuites
+
+
+def iter_testcases(xmind_file, options=None, testsuites=None):
+    """Load the XMind file and yield its testcase data one by one
+
+    Unless the workbook is already cached, testcases are streamed straight out of the parser
+    without building the testsuite tree, so the first one is available before parsing finishes.
+
+    :param xmind_file: the target XMind file
+    :param testsuites: the parsed testsuites of the file or a loader of them, see `resolve_testsuites`
+    :return: a generator of testcase data, each one has the extra `product` and `suite` keys
+    """
+    if testsuites is not None:
+        yield from iter_testsuites_testcases(resolve_testsuites(xmind_file, options, testsuites))
+        return
+
+    xmind_file = get_absolute_path(xmind_file)
+    options = get_parse_options(options)
+    cache_key = get_workbook_cache_key(xmind_file, options)
+    testsuites = workbook_cache.get(cache_key) if cache_key else None
+
+    if testsuites is not None:
+        yield from iter_testsuites_testcases(testsuites)
+        return
+
+    xmind_content_dict = load_xmind_content(xmind_file)
+    if not xmind_content_dict:
+        logging.error('Invalid XMind file(%s): it is empty!', xmind_file)
+        return
+
+    for product, suite_name, case in iter_xmind_testcases(xmind_content_dict, options):
+        case_data = case.to_dict()
+        case_data['product'] = product
+        case_data['suite'] = suite_name
+        yield case_data
 
-def xmind_testsuite_to_json_file(xmind_file):
-    """Convert XMind file to a testsuite json file"""
+
+def xmind_testsuite_to_json_file(xmind_file, options=None, testsuites=None):
+    """Convert XMind file to a testsuite json file
+
+    :param testsuites: the parsed testsuites of the file or a loader of them, see `resolve_testsuites`
+    """
     xmind_file = get_absolute_path(xmind_file)
     logging.info('Start converting XMind file(%s) to testsuites json file...', xmind_file)
-    testsuites = get_xmind_testsuite_list(xmind_file)
     testsuite_json_file = xmind_file[:-6] + '_testsuite.json'
 
-    if os.path.exists(testsuite_json_file):
-        os.remove(testsuite_json_file)
-        # logging.info('The testsuite json file already exists, return it directly: %s', testsuite_json_file)
-        # return testsuite_json_file
+    def write(f):
+        parsed = gen_testsuites_statistics(resolve_testsuites(xmind_file, options, testsuites))
 
-    with open(testsuite_json_file, 'w', encoding='utf8') as f:
-        f.write(json.dumps(testsuites, indent=4, separators=(',', ': '), ensure_ascii=False))
-        logging.info('Convert XMind file(%s) to a testsuite json file(%s) successfully!', xmind_file, testsuite_json_file)
+        with stage(STAGE_WRITE, len(parsed)):
+            dump_json(parsed, f)
+
+    convert_artifact(testsuite_json_file, gen_artifact_meta(xmind_file, 'testsuite_json', options), write)
+    logging.info('Convert XMind file(%s) to a testsuite json file(%s) successfully!', xmind_file, testsuite_json_file)
 
     return testsuite_json_file
 
 
-def xmind_testcase_to_json_file(xmind_file):
-    """Convert XMind file to a testcase json file"""
+def xmind_testcase_to_json_file(xmind_file, options=None, testsuites=None):
+    """Convert XMind file to a testcase json file
+
+    :param testsuites: the parsed testsuites of the file or a loader of them, see `resolve_testsuites`
+    """
     xmind_file = get_absolute_path(xmind_file)
     logging.info('Start converting XMind file(%s) to testcases json file...', xmind_file)
-    testcases = get_xmind_testcase_list(xmind_file)
     testcase_json_file = xmind_file[:-6] + '.json'
 
-    if os.path.exists(testcase_json_file):
-        os.remove(testcase_json_file)
-        # logging.info('The testcase json file already exists, return it directly: %s', testcase_json_file)
-        # return testcase_json_file
+    def write(f):
+        with stage(STAGE_WRITE):
+            dump_json(iter_testcases(xmind_file, options, testsuites), f)
 
-    with open(testcase_json_file, 'w', encoding='utf8') as f:
-        f.write(json.dumps(testcases, indent=4, separators=(',', ': '), ensure_ascii=False))
-        logging.info('Convert XMind file(%s) to a testcase json file(%s) successfully!', xmind_file, testcase_json_file)
+    convert_artifact(testcase_json_file, gen_artifact_meta(xmind_file, 'testcase_json', options), write)
+    logging.info('Convert XMind file(%s) to a testcase json file(%s) successfully!', xmind_file, testcase_json_file)
 
     return testcase_json_file
+
+
+@contextmanager
+def open_gzip_text(path, output_file):
+    """Open a utf8 text file writing gzip data to the path, with a reproducible header
+
+    The header records the name of the output file instead of the path (a temp file), and no mtime,
+    so the same content always gives the same bytes.
+    """
+    with open(path, 'wb') as f, \
+            gzip.GzipFile(filename=os.path.basename(output_file), mode='wb', fileobj=f, mtime=0) as gzip_file, \
+            io.TextIOWrapper(gzip_file, encoding='utf8') as text_file:
+        yield text_file
+
+
+def xmind_testcase_to_jsonl_file(xmind_file, options=None, compress=False, testsuites=None):
+    """Convert XMind file to a testcase JSON Lines file, one compact testcase object per line
+
+    :param compress: write a gzip compressed `.jsonl.gz` file instead
+    :param testsuites: the parsed testsuites of the file or a loader of them, see `resolve_testsuites`
+    """
+    xmind_file = get_absolute_path(xmind_file)
+    logging.info('Start converting XMind file(%s) to testcases jsonl file...', xmind_file)
+    testcase_jsonl_file = xmind_file[:-6] + ('.jsonl.gz' if compress else '.jsonl')
+
+    def write(f):
+        with stage(STAGE_WRITE) as write_stage:
+            write_stage.add(dump_jsonl(iter_testcases(xmind_file, options, testsuites), f))
+
+    opener = (lambda path: open_gzip_text(path, testcase_jsonl_file)) if compress else None
+    meta = gen_artifact_meta(xmind_file, 'testcase_jsonl', options, compress=compress)
+    convert_artifact(testcase_jsonl_file, meta, write, opener)
+    logging.info('Convert XMind file(%s) to a testcase jsonl file(%s) successfully!', xmind_file, testcase_jsonl_file)
+
+    return testcase_jsonl_file
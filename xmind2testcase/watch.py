@@ -0,0 +1,142 @@
+#!/usr/bin/env python
+# _*_ coding:utf-8 _*_
+import logging
+import os
+import threading
+import time
+from collections import namedtuple
+
+from xmind2testcase.batch import discover_xmind_files
+from xmind2testcase.pipeline import DEFAULT_SINKS, check_sinks, convert
+from xmind2testcase.utils import workbook_cache
+
+"""
+Watch the XMind files of a file, a directory or a glob pattern, and convert every saved file again
+
+    XMindWatcher('path/to/testcases', sinks=['csv', 'xml']).run()
+
+The files are polled by their size and mtime, a file is converted once it's left unchanged for the debounce delay,
+so a burst of saves is converted once. The process keeps the imported converters warm between the saves,
+the parsed workbooks stay in `workbook_cache` keyed by their path, size and mtime, so a saved file can't hit
+a former version, and only the sinks whose output is out of date are written again.
+"""
+
+POLL_INTERVAL = 0.5
+DEBOUNCE_DELAY = 0.3
+
+WatchEvent = namedtuple('WatchEvent', ['xmind_file', 'outputs', 'saves', 'convert_time', 'latency', 'error'])
+
+
+def get_file_signature(xmind_file):
+    """(size, mtime) of the file, or None if it's gone"""
+    try:
+        stat = os.stat(xmind_file)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+class XMindWatcher(object):
+    """Poll the XMind files found at a path and convert the changed ones"""
+
+    def __init__(self, path, sinks=DEFAULT_SINKS, options=None, interval=POLL_INTERVAL, debounce=DEBOUNCE_DELAY):
+        """
+        XMindWatcher
+        :param path: a XMind file, a directory or a glob pattern, new matching files are picked up too
+        :param sinks: the sink names, see `xmind2testcase.pipeline.SINKS`
+        :param options: the `xmind2testcase.parser.ParseOptions`
+        :param interval: the polling interval in seconds
+        :param debounce: the seconds a file must stay unchanged before it's converted
+        """
+        check_sinks(sinks)
+
+        self.path = path
+        self.sinks = list(sinks)
+        self.options = options
+        self.interval = interval
+        self.debounce = debounce
+        self._signatures = {}  # xmind file -> the signature of its last conversion
+        self._pending = {}  # xmind file -> [signature, last change time, number of saves]
+        self._stop = threading.Event()
+
+    def scan(self):
+        """Return {xmind file: signature} of the files found at the path"""
+        signatures = {}
+        for xmind_file in discover_xmind_files(self.path):
+            signature = get_file_signature(xmind_file)
+            if signature is not None:
+                signatures[xmind_file] = signature
+        return signatures
+
+    def poll(self, now=None):
+        """Scan the files once, return the files whose changes have settled for the debounce delay"""
+        now = time.monotonic() if now is None else now
+        signatures = self.scan()
+
+        for xmind_file in set(self._signatures) - set(signatures):
+            logging.info('XMind file removed: %s', xmind_file)
+            del self._signatures[xmind_file]
+            self._pending.pop(xmind_file, None)
+            workbook_cache.discard(xmind_file)
+
+        for xmind_file, signature in signatures.items():
+            pending = self._pending.get(xmind_file)
+            if pending is not None:
+                if pending[0] != signature:
+                    pending[0], pending[1], pending[2] = signature, now, pending[2] + 1
+            elif self._signatures.get(xmind_file) != signature:
+                self._pending[xmind_file] = [signature, now, 1]
+
+        return sorted(xmind_file for xmind_file, (_, changed_at, _) in self._pending.items()
+                      if now - changed_at >= self.debounce)
+
+    def convert(self, xmind_file):
+        """Convert the file with the sinks, return a `WatchEvent`"""
+        signature, _, saves = self._pending.pop(xmind_file, (get_file_signature(xmind_file), 0, 0))
+        self._signatures[xmind_file] = signature
+
+        start = time.perf_counter()
+        try:
+            result = convert(xmind_file, sinks=self.sinks, options=self.options)
+        except Exception as e:
+            logging.error('Failed to convert XMind file(%s): %s', xmind_file, e)
+            return WatchEvent(xmind_file, None, saves, time.perf_counter() - start, None, e)
+
+        convert_time = time.perf_counter() - start
+        latency = time.time() - signature[1] / 1e9 if signature else None
+        return WatchEvent(xmind_file, result.outputs, saves, convert_time, latency, None)
+
+    def run(self, initial=True, on_event=None):
+        """Poll and convert until `stop` is called or the process is interrupted
+
+        :param initial: convert all the files found at the start, the up to date outputs are kept
+        :param on_event: called with the `WatchEvent` of every conversion, logging it by default
+        """
+        on_event = on_event or log_event
+        self._signatures = self.scan()
+        logging.info('Watching %d XMind files at %s for %s...', len(self._signatures), self.path, ', '.join(self.sinks))
+        if initial:
+            for xmind_file in sorted(self._signatures):
+                on_event(self.convert(xmind_file))
+
+        try:
+            while not self._stop.wait(self.interval):
+                for xmind_file in self.poll():
+                    on_event(self.convert(xmind_file))
+        except KeyboardInterrupt:
+            logging.info('Stop watching %s', self.path)
+
+    def stop(self):
+        self._stop.set()
+
+
+def log_event(event):
+    if event.error is not None:
+        return
+    if event.saves:
+        logging.info('Converted XMind file(%s) in %.2f ms, %.2f ms after the last of %d saves: %s',
+                     event.xmind_file, event.convert_time * 1000, event.latency * 1000, event.saves,
+                     ', '.join(event.outputs.values()))
+    else:
+        logging.info('Converted XMind file(%s) in %.2f ms: %s',
+                     event.xmind_file, event.convert_time * 1000, ', '.join(event.outputs.values()))
@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+# _*_ coding:utf-8 _*_
+try:
+    import openpyxl
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Alignment, Font, NamedStyle
+    from openpyxl.styles.fonts import DEFAULT_FONT
+except ImportError:  # openpyxl is an optional dependency, only the xlsx files need it
+    raise ImportError('openpyxl is required to write xlsx files, install it with: pip install xmind2testcase[xlsx]')
+
+"""
+Stream rows into a xlsx file with openpyxl in write-only mode, the memory doesn't grow with the number of rows
+
+The styles are created once: one named style for the header and one for the cells,
+the column widths and the hidden columns are set before the first row.
+"""
+
+
+def write_only_xlsx(output, headers, rows, column_widths=None, hide_columns=None, style_dict=None):
+    """Write the header and the rows to a xlsx file
+
+    :param output: the xlsx file path or a binary file object
+    :param rows: an iterable of the row values
+    :param column_widths: the widths by column letter, like {'A': 20, 'B': 30}
+    :param hide_columns: the letters of the hidden columns
+    :param style_dict: {'alignment': the keyword arguments of `Alignment`,
+                        'font': {'font_size': .., 'bold': .., 'font_color': ..} of the header}
+    :return: the number of rows, the header excluded
+    """
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet()
+
+    cell_style = header_style = None
+    if style_dict:
+        cell_style = NamedStyle(name='cell', alignment=Alignment(**style_dict['alignment']), font=DEFAULT_FONT)
+        header_style = NamedStyle(name='header', alignment=Alignment(**style_dict['alignment']),
+                                  font=Font(size=style_dict['font']['font_size'], bold=style_dict['font']['bold'],
+                                            color=style_dict['font']['font_color']))
+        wb.add_named_style(cell_style)
+        wb.add_named_style(header_style)
+
+    for column, width in (column_widths or {}).items():
+        ws.column_dimensions[column].width = width
+    for column in hide_columns or []:
+        ws.column_dimensions.group(column, hidden=True)
+
+    def styled(values, style):
+        if style is None:
+            return values
+        cells = []
+        for value in values:
+            cell = WriteOnlyCell(ws, value=value)
+            cell.style = style.name
+            cells.append(cell)
+        return cells
+
+    ws.append(styled(headers, header_style))
+    count = 0
+    for row in rows:
+        ws.append(styled(row, cell_style))
+        count += 1
+
+    wb.save(output)
+    return count
@@ -1,10 +1,10 @@
 #!/usr/bin/env python
 # _*_ coding:utf-8 _*_
-import csv
 import logging
-import os
-from xmind2testcase.utils import get_xmind_testcase_list, get_absolute_path
-from Utils.Excelize import csv_2_excel
+from xmind2testcase.artifact import gen_artifact_meta, convert_artifact
+from xmind2testcase.columns import constant, field, compile_columns, iter_rows, write_csv_rows, UNDEFINED_COLUMN
+from xmind2testcase.instrument import stage, STAGE_WRITE
+from xmind2testcase.utils import iter_testcases, get_absolute_path
 
 """
 Convert XMind fie to Zentao testcase csv file 
@@ -12,88 +12,94 @@ Convert XMind fie to Zentao testcase csv file
 Zentao official document about import CSV testcase file: https://www.zentao.net/book/zentaopmshelp/243.mhtml 
 """
 
-
-def xmind_to_zentao_csv_file(xmind_file):
-    """Convert XMind file to a zentao csv file"""
+ZENTAO_HEADERS = ["ID", "用例名称", "所属模块", "标签", "前置条件", "备注", "步骤描述", "预期结果", "编辑模式", "用例等级",
+                  "责任人", "用例状态"]
+# the metersphere import file has one more column than the zentao one
+METERSPHERE_HEADERS = ZENTAO_HEADERS + ["excution_type"]
+
+# the look of the metersphere xlsx file
+METERSPHERE_HIDE_COLUMNS = ['A', 'D', 'F', 'I', 'L', 'K']
+METERSPHERE_COLUMN_WIDTHS = {
+    'B': 30,
+    'C': 10,
+    'E': 30,
+    'G': 50,
+    'H': 50,
+}
+METERSPHERE_STYLE = {
+    'font':
+        {
+            'font_size': 11,
+            'font_color': 'FF0000',
+            'bold': True,
+            'align': 'center',
+            'valign': 'vcenter',
+        },
+    'alignment':
+        {
+            'wrap_text': True,
+            'shrink_to_fit': True
+        }
+
+}
+
+
+def xmind_to_zentao_csv_file(xmind_file, options=None, testsuites=None):
+    """Convert XMind file to a zentao csv file
+
+    :param testsuites: the parsed testsuites of the file or a loader of them, see `utils.resolve_testsuites`
+    """
     xmind_file = get_absolute_path(xmind_file)
     logging.info('Start converting XMind file(%s) to zentao file...', xmind_file)
-    testcases = get_xmind_testcase_list(xmind_file)
-
-    file_header = ["ID", "用例名称", "所属模块", "标签", "前置条件", "备注", "步骤描述", "预期结果", "编辑模式",
-                   "用例等级",
-                   "责任人", "用例状态"]
-    zentao_testcase_rows = [file_header]
-    for testcase in testcases:
-        row = gen_a_testcase_row(testcase, file_header)
-        zentao_testcase_rows.append(row)
-
     zentao_file = xmind_file[:-6] + '.csv'
-    if os.path.exists(zentao_file):
-        os.remove(zentao_file)
 
-    with open(zentao_file, 'w', encoding='utf8', newline='') as f:
-        writer = csv.writer(f)
-        writer.writerows(zentao_testcase_rows)
-        logging.info('Convert XMind file(%s) to a zentao csv file(%s) successfully!', xmind_file, zentao_file)
+    def write(f):
+        with stage(STAGE_WRITE) as write_stage:
+            write_stage.add(write_csv_rows(f, ZENTAO_HEADERS, iter_testcases(xmind_file, options, testsuites),
+                                            COLUMN_SPECS))
+
+    meta = gen_artifact_meta(xmind_file, 'zentao', options)
+    convert_artifact(zentao_file, meta, write, opener=lambda path: open(path, 'w', encoding='utf8', newline=''))
+    logging.info('Convert XMind file(%s) to a zentao csv file(%s) successfully!', xmind_file, zentao_file)
 
     return zentao_file
 
 
 def csv_2_metersphere(csv_file):
-    hide_columns = ['A', 'D', 'F', 'I', 'L', 'K']
-    column_widths = {
-        'B': 30,
-        'C': 10,
-        'E': 30,
-        'G': 50,
-        'H': 50,
-    }
-    style_dict = {
-        'font':
-            {
-                'font_size': 11,
-                'font_color': 'FF0000',
-                'bold': True,
-                'align': 'center',
-                'valign': 'vcenter',
-            },
-        'alignment':
-            {
-                'wrap_text': True,
-                'shrink_to_fit': True
-            }
-
-    }
-
+    from Utils.Excelize import csv_2_excel  # openpyxl is only needed by the xlsx files
     excel_file_name = csv_file[:-4] + '.xlsx'
-    csv_2_excel(csv_file, excel_file_name, hide_columns, column_widths, style_dict)
+    csv_2_excel(csv_file, excel_file_name, METERSPHERE_HIDE_COLUMNS, METERSPHERE_COLUMN_WIDTHS, METERSPHERE_STYLE)
 
 
-def gen_a_testcase_row(testcase_dict, file_header):
-    case_step, case_expected_result = gen_case_step_and_expected_result(testcase_dict['steps'])
-
-    mapping = {"ID": '',
-               "用例名称": testcase_dict['name'],
-               "所属模块": gen_case_module(testcase_dict['product'], testcase_dict['suite']),
-               "标签": '',
-               "前置条件": testcase_dict['preconditions'],
-               "备注": testcase_dict['summary'],
-               "步骤描述": case_step,
-               "预期结果": case_expected_result,
-               "编辑模式": 'STEP',
-               "用例等级": gen_case_priority(testcase_dict['importance']),
-               "责任人": 'july',
-               "用例状态": 'Prepare',
-               "执行类型": gen_case_execution_type(testcase_dict['execution_type'])
-               }
-    row = []
-    for case_key in file_header:
-        try:
-            row.append(mapping[case_key])
-        except KeyError:
-            row.append('未定义此列头内容')
-    return row
+def xmind_to_metersphere_xlsx_file(xmind_file, options=None, headers=None, testsuites=None):
+    """Convert XMind file to a metersphere xlsx file, the rows are streamed into the sheet without a csv file
+
+    :param headers: the layout of the sheet, `METERSPHERE_HEADERS` by default
+    :param testsuites: the parsed testsuites of the file or a loader of them, see `utils.resolve_testsuites`
+    """
+    # openpyxl is only needed by the xlsx files, fail before the conversion starts if it's missing
+    from xmind2testcase.xlsx import write_only_xlsx
+
+    xmind_file = get_absolute_path(xmind_file)
+    logging.info('Start converting XMind file(%s) to metersphere xlsx file...', xmind_file)
+    xlsx_file = xmind_file[:-6] + '.xlsx'
+    headers = headers or METERSPHERE_HEADERS
+
+    def write(f):
+        rows = iter_rows(iter_testcases(xmind_file, options, testsuites), compile_columns(headers, COLUMN_SPECS))
+        with stage(STAGE_WRITE) as write_stage:
+            write_stage.add(write_only_xlsx(f, headers, rows, METERSPHERE_COLUMN_WIDTHS, METERSPHERE_HIDE_COLUMNS,
+                                            METERSPHERE_STYLE))
 
+    meta = gen_artifact_meta(xmind_file, 'metersphere_xlsx', options, headers=headers)
+    convert_artifact(xlsx_file, meta, write, opener=lambda path: open(path, 'wb'))
+    logging.info('Convert XMind file(%s) to a metersphere xlsx file(%s) successfully!', xmind_file, xlsx_file)
+
+    return xlsx_file
+
+
+def gen_a_testcase_row(testcase_dict, file_header):
+    return [extract(testcase_dict) for extract in compile_columns(file_header, COLUMN_SPECS, UNDEFINED_COLUMN)]
 
 
 def gen_case_module(product_name, module_name):
@@ -101,19 +107,17 @@ def gen_case_module(product_name, module_name):
 
 
 def gen_case_step_and_expected_result(steps):
-    case_step = ''
-    case_expected_result = ''
+    return gen_case_steps(steps), gen_case_expected_results(steps)
+
 
-    for step_dict in steps:
-        case_step += f"{str(step_dict['step_number'])}. {step_dict['actions'].replace('\n', '').strip()}\n"
-        case_expected_result += str(step_dict['step_number']) + '. ' + \
-                                step_dict['expected_results'].replace('\n', '').strip() + '\n' \
-            if step_dict.get('expected_results', '') else ''
-    # 去除最后的空行
-    case_step = case_step[:-1]
-    case_expected_result = case_expected_result[:-1]
+def gen_case_steps(steps):
+    return '\n'.join('%s. %s' % (step_dict['step_number'], step_dict['actions'].replace('\n', '').strip())
+                     for step_dict in steps)
 
-    return case_step, case_expected_result
+
+def gen_case_expected_results(steps):
+    return '\n'.join('%s. %s' % (step_dict['step_number'], step_dict['expected_results'].replace('\n', '').strip())
+                     for step_dict in steps if step_dict.get('expected_results', ''))
 
 
 def gen_case_priority(priority):
@@ -133,6 +137,30 @@ def gen_case_execution_type(case_type):
         return 'manual'
 
 
+def gen_case_execution_type_name(case_type):
+    mapping = {1: 'manual', 2: 'automatic'}
+    return mapping.get(case_type, 'manual') if isinstance(case_type, int) else 'manual'
+
+
+# header: extractor of the cell value from the testcase data
+COLUMN_SPECS = {
+    "ID": constant(''),
+    "用例名称": field('name'),
+    "所属模块": lambda testcase_dict: gen_case_module(testcase_dict['product'], testcase_dict['suite']),
+    "标签": constant(''),
+    "前置条件": field('preconditions'),
+    "备注": field('summary'),
+    "步骤描述": lambda testcase_dict: gen_case_steps(testcase_dict['steps']),
+    "预期结果": lambda testcase_dict: gen_case_expected_results(testcase_dict['steps']),
+    "编辑模式": constant('STEP'),
+    "用例等级": lambda testcase_dict: gen_case_priority(testcase_dict['importance']),
+    "责任人": constant('july'),
+    "用例状态": constant('Prepare'),
+    "执行类型": lambda testcase_dict: gen_case_execution_type(testcase_dict['execution_type']),
+    "excution_type": lambda testcase_dict: gen_case_execution_type_name(testcase_dict['execution_type']),
+}
+
+
 if __name__ == '__main__':
     xmind_file = '../docs/zentao_testcase_template.xmind'
     zentao_csv_file = xmind_to_zentao_csv_file(xmind_file)